@@ -1,3 +1,204 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.http import QueryDict
+from django.template.response import TemplateResponse
+from django.utils.html import format_html
 
-# Register your models here.
+from .models import Profile
+from .paginator import EstimatedCountPaginator
+from .purge import (
+    batched, deactivate_users, delete_users, media_files, remove_media
+)
+from .sharding import all_shards, shard_for
+from .thumbnails import make_preview, make_resized
+
+
+ACTION_BATCH_SIZE = 500
+
+
+def in_batches(queryset, batch_size=ACTION_BATCH_SIZE):
+    '''Yield the queryset in primary-key ordered slices so a bulk action
+    never holds more than `batch_size` rows in memory at once.'''
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    for batch in batched(pks, batch_size):
+        yield queryset.model._default_manager.using(queryset.db).filter(
+            pk__in=batch
+        )
+
+
+def search_user_ids(search_term):
+    '''Users whose username or email is exactly `search_term`; they
+    always live on `default`.'''
+    return list(get_user_model()._default_manager.filter(
+        Q(username=search_term) | Q(email=search_term)
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def selected_shard(request):
+    '''The shard the changelist shows: the one picked in the filter, or
+    else the home shard of the first user a search matches, so searching
+    finds a profile wherever it lives. The change, delete and history
+    views see both through `_changelist_filters`, which the admin carries
+    along on every link out of the changelist.'''
+    if not hasattr(request, '_profile_shard'):
+        params = request.GET
+        if '_changelist_filters' in params:
+            params = QueryDict(params['_changelist_filters'])
+        alias = params.get(ShardListFilter.parameter_name)
+        search_term = params.get(SEARCH_VAR, '').strip()
+        if alias is None and search_term:
+            user_ids = search_user_ids(search_term)
+            alias = shard_for(user_ids[0]) if user_ids else None
+        request._profile_shard = alias if alias in all_shards() else 'default'
+    return request._profile_shard
+
+
+class ShardListFilter(admin.SimpleListFilter):
+    '''Browse one profile shard at a time; users always live on
+    `default`, so they are prefetched rather than joined.
+
+    There is no "All": a changelist reads from one database, and
+    without a choice it shows `default`, which is listed as selected.'''
+    title = 'shard'
+    parameter_name = 'shard'
+
+    def __init__(self, request, params, model, model_admin):
+        self.shard = selected_shard(request)
+        super().__init__(request, params, model, model_admin)
+
+    def lookups(self, request, model_admin):
+        shards = all_shards()
+        return [(alias, alias) for alias in shards] if len(shards) > 1 else []
+
+    def choices(self, cl):
+        for alias, title in self.lookup_choices:
+            yield {
+                'selected': alias == self.shard,
+                'query_string': cl.get_query_string(
+                    {self.parameter_name: alias}
+                ),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        if queryset.db != 'default':
+            return queryset.prefetch_related('user')
+        return queryset
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'email', 'birth', 'avatar_preview')
+    list_select_related = ('user',)
+    search_fields = ('=user__username', '=user__email')
+    raw_id_fields = ('user',)
+    list_filter = (ShardListFilter,)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['rebuild_avatar_previews']
+
+    def email(self, profile):
+        return profile.user.email
+    email.admin_order_field = 'user__email'
+
+    def avatar_preview(self, profile):
+        if not profile.avatar:
+            return ''
+        return format_html(
+            '<img src="{}" width="32" alt="">',
+            profile.avatar_preview_url
+        )
+    avatar_preview.short_description = 'Avatar'
+
+    def get_queryset(self, request):
+        '''Read from the selected shard, so a pk from its changelist opens
+        the same row and not whichever profile has that pk on `default`.'''
+        return super().get_queryset(request).using(selected_shard(request))
+
+    def get_list_select_related(self, request):
+        if selected_shard(request) != 'default':
+            return ()
+        return self.list_select_related
+
+    def get_search_results(self, request, queryset, search_term):
+        '''Exact matches only: `icontains` across the user table cannot use
+        an index and turns every search into a sequential scan. Users are
+        resolved on `default` first, and selected_shard has already sent
+        the query to the shard of the first of them.'''
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return queryset.filter(user_id__in=search_user_ids(search_term)), False
+
+    def rebuild_avatar_previews(self, request, queryset):
+        rebuilt = 0
+        for batch in in_batches(queryset.exclude(avatar='')):
+            for profile in batch.only('pk', 'avatar'):
+                make_preview(profile.avatar)
+                make_resized(profile.avatar)
+                rebuilt += 1
+        self.message_user(
+            request, f"Rebuilt previews and resized copies of {rebuilt} avatars."
+        )
+    rebuild_avatar_previews.short_description = (
+        "Rebuild avatar previews and resized copies"
+    )
+
+
+class BatchedUserAdmin(UserAdmin):
+    '''UserAdmin whose bulk removal works through the selection in
+    batches instead of collecting every related object at once.'''
+    actions = ['deactivate_selected', 'delete_selected_with_media']
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def deactivate_selected(self, request, queryset):
+        pks = queryset.order_by('pk').values_list('pk', flat=True)
+        deactivated = sum(
+            deactivate_users(batch) for batch in batched(pks, ACTION_BATCH_SIZE)
+        )
+        self.message_user(request, f"Deactivated {deactivated} users.")
+    deactivate_selected.short_description = "Deactivate selected users"
+
+    def delete_selected_with_media(self, request, queryset):
+        if not self.has_delete_permission(request):
+            raise PermissionDenied
+        if not request.POST.get('post'):
+            return TemplateResponse(
+                request, 'admin/accounts/purge_users_confirmation.html', {
+                    **self.admin_site.each_context(request),
+                    'opts': self.model._meta,
+                    'count': queryset.count(),
+                    'select_across': request.POST.get('select_across') == '1',
+                    'selected': request.POST.getlist(
+                        admin.ACTION_CHECKBOX_NAME
+                    ),
+                    'action_checkbox_name': admin.ACTION_CHECKBOX_NAME,
+                }
+            )
+        pks = queryset.order_by('pk').values_list('pk', flat=True)
+        deleted = removed = 0
+        for batch in batched(pks, ACTION_BATCH_SIZE):
+            names = media_files(batch)
+            for user in queryset.model._default_manager.filter(pk__in=batch):
+                self.log_deletion(request, user, str(user))
+            delete_users(batch)
+            removed += remove_media(names)
+            deleted += len(batch)
+        self.message_user(
+            request, f"Deleted {deleted} users and {removed} avatar files."
+        )
+    delete_selected_with_media.short_description = (
+        "Delete selected users and their avatars"
+    )
+
+
+admin.site.unregister(get_user_model())
+admin.site.register(get_user_model(), BatchedUserAdmin)
@@ -0,0 +1,127 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.db.models.functions import Lower
+
+
+def normalize_username(username):
+    return username.strip()
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def username_taken(username, exclude_pk=None):
+    users = get_user_model()._default_manager.filter(
+        username=normalize_username(username)
+    )
+    if exclude_pk is not None:
+        users = users.exclude(pk=exclude_pk)
+    return users.exists()
+
+
+def email_taken(email, exclude_pk=None):
+    '''Filters on LOWER(email) and repeats the `email <> ''` condition of
+    the partial unique index from migration 0006 word for word; SQLite
+    only uses a partial index when the query states its WHERE clause.'''
+    User = get_user_model()
+    users = User._default_manager.annotate(
+        email_lower=Lower('email')
+    ).filter(email_lower=normalize_email(email)).extra(
+        where=[f"{User._meta.db_table}.email <> ''"]
+    )
+    if exclude_pk is not None:
+        users = users.exclude(pk=exclude_pk)
+    return users.exists()
+
+
+class BloomFilter:
+    '''Fixed-size Bloom filter over strings.
+
+    `in` may answer True for a value that was never added, but never
+    False for one that was.'''
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class AvailabilityIndex:
+    '''Per-worker Bloom filter of every username and email in use.
+
+    A miss means the value is free without touching the database; a hit is
+    confirmed with an indexed lookup. Saves in this worker are added via
+    the User post_save signal; the filter is rebuilt every `max_age`
+    seconds to pick up saves from other workers and to shed deletions.'''
+
+    def __init__(self, error_rate=0.01, max_age=300):
+        self.error_rate = error_rate
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._filter = None
+        self._built_at = 0
+
+    def _build(self):
+        users = get_user_model()._default_manager.values_list('username', 'email')
+        bloom = BloomFilter(users.count() * 2 + 1000, self.error_rate)
+        for username, email in users.iterator():
+            bloom.add(f"u:{normalize_username(username)}")
+            if email:
+                bloom.add(f"e:{normalize_email(email)}")
+        return bloom
+
+    def _current(self):
+        with self._lock:
+            if self._filter is None or time.monotonic() - self._built_at > self.max_age:
+                self._filter = self._build()
+                self._built_at = time.monotonic()
+            return self._filter
+
+    def add(self, username='', email=''):
+        with self._lock:
+            if self._filter is None:
+                return
+            if username:
+                self._filter.add(f"u:{normalize_username(username)}")
+            if email:
+                self._filter.add(f"e:{normalize_email(email)}")
+
+    def invalidate(self):
+        with self._lock:
+            self._filter = None
+
+    def username_available(self, username):
+        if f"u:{normalize_username(username)}" not in self._current():
+            return True
+        return not username_taken(username)
+
+    def email_available(self, email):
+        if f"e:{normalize_email(email)}" not in self._current():
+            return True
+        return not email_taken(email)
+
+
+index = AvailabilityIndex()
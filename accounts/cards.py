@@ -0,0 +1,47 @@
+import json
+
+from .models import ProfileCard
+from .sharding import shard_for
+
+
+CARD_USER_FIELDS = {'username', 'first_name', 'last_name', 'email'}
+
+
+def card_data(profile, user):
+    '''The values profile.html shows for `profile` and its `user`.'''
+    return {
+        'username': user.username,
+        'full_name': user.get_full_name(),
+        'email': user.email,
+        'bio': profile.bio,
+        'birth': str(profile.birth),
+        'avatar_url': profile.avatar.url if profile.avatar else '',
+        'avatar_preview_url': profile.avatar_preview_url,
+        'avatar_resized': profile.avatar_resized,
+        'avatar_width': profile.avatar_width,
+        'avatar_height': profile.avatar_height,
+    }
+
+
+def serialize(data):
+    return json.dumps(data, sort_keys=True)
+
+
+def rebuild_card(profile, user=None, using=None):
+    '''Write `profile`'s card next to it and return the card's values.'''
+    data = card_data(profile, user or profile.user)
+    using = using or profile._state.db
+    cards = ProfileCard.objects.using(using)
+    if not cards.filter(pk=profile.user_id).update(data=serialize(data)):
+        cards.create(user_id=profile.user_id, data=serialize(data))
+    return data
+
+
+def load_card(user):
+    '''`user`'s card values from its home shard, or None when there is
+    no card there (no profile yet, or one a rebalance has not moved).'''
+    data = (
+        ProfileCard.objects.using(shard_for(user.pk))
+        .filter(pk=user.pk).values_list('data', flat=True).first()
+    )
+    return json.loads(data) if data is not None else None
@@ -7,9 +7,13 @@ from django.contrib.auth import get_user_model
 from django.forms.widgets import EmailInput
 
 
+from .availability import email_taken
 from .validate import validate_bio, validate_date
 
 
+EMAIL_TAKEN_MSG = "An account with that email already exists."
+
+
 class UserAccountCreationForm(UserCreationForm):
 
     verify_email = forms.EmailField(label="Verify your email")
@@ -29,11 +33,24 @@ class UserAccountCreationForm(UserCreationForm):
         for form_field in self.fields.values():
             form_field.widget.attrs.update(placeholder=form_field.label)
 
+    def clean_email(self):
+        email = self.cleaned_data['email']
+        if email and email_taken(email):
+            raise ValidationError(EMAIL_TAKEN_MSG)
+        return email
+
+    def clean_password2(self):
+        # UserCreationForm only copies the username onto the instance
+        # before validating; the personal-info check needs the names too.
+        for field in ('first_name', 'last_name', 'email'):
+            setattr(self.instance, field, self.cleaned_data.get(field, ''))
+        return super().clean_password2()
+
     def clean_verify_email(self):
-        my_email = self.cleaned_data['email']
+        my_email = self.cleaned_data.get('email')
         verify_email = self.cleaned_data['verify_email']
 
-        if my_email != verify_email:
+        if 'email' in self.cleaned_data and my_email != verify_email:
             msg = "Email doesn't match the previously entered email."
             raise ValidationError(msg)
 
@@ -59,6 +76,12 @@ class EditUserForm(forms.ModelForm):
         for form_field in self.fields.values():
             form_field.widget.attrs.update(placeholder=form_field.label)
 
+    def clean_email(self):
+        email = self.cleaned_data['email']
+        if email and email_taken(email, exclude_pk=self.instance.pk):
+            raise ValidationError(EMAIL_TAKEN_MSG)
+        return email
+
     def clean_verify_email(self):
         my_email = self.cleaned_data['email']
         verify_email = self.cleaned_data['verify_email']
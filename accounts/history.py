@@ -0,0 +1,184 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import Profile, ProfileChange
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FIELDS = ('birth', 'bio', 'avatar')
+USER_FIELDS = ('first_name', 'last_name', 'email')
+
+
+def _serialize(value):
+    if hasattr(value, 'name'):
+        # FieldFile / UploadedFile: only the stored name is history.
+        return value.name or ''
+    return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+
+
+def diff_forms(*forms):
+    '''Return {field: [old, new]} for every changed field of the bound,
+    saved model forms passed in.'''
+    changes = {}
+    for form in forms:
+        for name in form.changed_data:
+            old = _serialize(form.initial.get(name))
+            new = _serialize(
+                form.instance._meta.get_field(name).value_from_object(
+                    form.instance
+                )
+            )
+            if old != new:
+                changes[name] = [old, new]
+    return changes
+
+
+class ChangeBuffer:
+    '''Per-worker buffer of ProfileChange rows.
+
+    Rows are written with one bulk INSERT by a background thread once
+    `batch_size` rows are waiting or `flush_interval` seconds have passed,
+    and whatever is left is written when the interpreter exits. Recording
+    never writes on the caller's thread when there is a flusher, and never
+    raises. While the database refuses the rows, at most `max_pending`
+    are kept; older ones are dropped with a logged error.'''
+
+    def __init__(self, batch_size=100, flush_interval=5.0, max_pending=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._pending = []
+        self._flusher = None
+        self._full = threading.Event()
+
+    def _trim(self):
+        excess = len(self._pending) - self.max_pending
+        if excess > 0:
+            del self._pending[:excess]
+            logger.error("Dropped %d buffered profile changes.", excess)
+
+    def record(self, user, changes, changed_at=None):
+        if not changes:
+            return
+        change = ProfileChange(
+            user_id=user.pk,
+            changed_at=changed_at or timezone.now(),
+            changes=json.dumps(changes, sort_keys=True)
+        )
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the parent's rows are the parent's to write.
+                self._reset()
+            self._pending.append(change)
+            self._trim()
+            full = len(self._pending) >= self.batch_size
+            self._start_flusher()
+            flusher = self._flusher
+        if not full:
+            return
+        if flusher is not None:
+            self._full.set()
+        else:
+            self._flush_logged()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            try:
+                ProfileChange.objects.bulk_create(pending)
+            except Exception:
+                # Keep the rows, ahead of any recorded since, for the
+                # next flush.
+                with self._lock:
+                    self._pending[:0] = pending
+                    self._trim()
+                raise
+        return len(pending)
+
+    def _flush_logged(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Could not write buffered profile changes.")
+            return False
+        return True
+
+    def _start_flusher(self):
+        if self._flusher is not None or not self.flush_interval:
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name='profile-history-flusher',
+            daemon=True
+        )
+        self._flusher.start()
+
+    def _flush_periodically(self):
+        while True:
+            self._full.wait(self.flush_interval)
+            self._full.clear()
+            close_old_connections()
+            if not self._flush_logged():
+                # Back off rather than retry on every edit while the
+                # database is failing.
+                time.sleep(self.flush_interval)
+
+    def __len__(self):
+        return len(self._pending)
+
+
+buffer = ChangeBuffer(
+    batch_size=getattr(settings, 'PROFILE_HISTORY_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'PROFILE_HISTORY_FLUSH_INTERVAL', 5.0),
+    max_pending=getattr(settings, 'PROFILE_HISTORY_MAX_PENDING', 10000)
+)
+atexit.register(buffer.flush)
+
+
+def record_profile_edit(user, *forms):
+    buffer.record(user, diff_forms(*forms))
+
+
+def profile_as_of(user, moment):
+    '''Rebuild the tracked profile and user fields as they stood at
+    `moment` by undoing every later change, newest first.'''
+    buffer.flush()
+    profile = Profile.objects.for_user(user)
+    state = {name: _serialize(getattr(profile, name)) for name in PROFILE_FIELDS}
+    state.update({name: getattr(profile.user, name) for name in USER_FIELDS})
+
+    later_changes = (
+        ProfileChange.objects.filter(user=user, changed_at__gt=moment)
+        .order_by('-changed_at', '-pk')
+        .values_list('changes', flat=True)
+    )
+    for changes in later_changes.iterator():
+        for name, (old, new) in json.loads(changes).items():
+            state[name] = old
+    return state
+
+
+def merge_changes(changes):
+    '''Collapse a chronological run of change dicts into one, keeping the
+    first old value and the last new value of each field.'''
+    merged = {}
+    for change in changes:
+        for name, (old, new) in change.items():
+            first_old = merged[name][0] if name in merged else old
+            merged[name] = [first_old, new]
+    return {name: pair for name, pair in merged.items() if pair[0] != pair[1]}
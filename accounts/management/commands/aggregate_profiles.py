@@ -0,0 +1,64 @@
+import os
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from project_7.profiling import profile_dir
+
+from ... import urls
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge the request profiles captured for each accounts URL into one "
+        "collapsed-stack file per URL name and print the hottest frames."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'url_names', nargs='*',
+            help="Limit to these accounts URL names (e.g. edit_profile)."
+        )
+        parser.add_argument('--top', type=int, default=5)
+
+    def handle(self, *args, **options):
+        url_names = options['url_names'] or [
+            pattern.name for pattern in urls.urlpatterns if pattern.name
+        ]
+        for url_name in url_names:
+            directory = profile_dir(f"accounts:{url_name}")
+            stacks, profiles = self._merge(directory)
+            if not profiles:
+                continue
+            with open(f"{directory}.collapsed", 'w') as merged:
+                for stack, count in stacks.most_common():
+                    merged.write(f"{stack} {count}\n")
+
+            total = sum(stacks.values())
+            self.stdout.write(
+                f"accounts:{url_name}: {profiles} profiles, {total} samples "
+                f"-> {directory}.collapsed"
+            )
+            if not total:
+                continue
+            leaves = Counter()
+            for stack, count in stacks.items():
+                leaves[stack.rsplit(';', 1)[-1]] += count
+            for frame, count in leaves.most_common(options['top']):
+                self.stdout.write(f"  {count / total:6.1%}  {frame}")
+
+    def _merge(self, directory):
+        stacks = Counter()
+        profiles = 0
+        if not os.path.isdir(directory):
+            return stacks, profiles
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.collapsed'):
+                    continue
+                profiles += 1
+                with open(entry.path) as collapsed:
+                    for line in collapsed:
+                        stack, _, count = line.rstrip('\n').rpartition(' ')
+                        stacks[stack] += int(count)
+        return stacks, profiles
@@ -0,0 +1,49 @@
+from django.core.files.images import get_image_dimensions
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models import Profile
+from ...sharding import all_shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Store width and height for avatars uploaded before the dimension "
+        "columns existed, so loading a profile never opens its image."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        filled = missing = 0
+        for alias in all_shards():
+            # Values only: instantiating a Profile with empty dimension
+            # columns would make the ImageField open the file itself.
+            pending = (
+                Profile.objects.using(alias)
+                .exclude(avatar='').filter(avatar_width__isnull=True)
+                .order_by('pk').values_list('pk', 'avatar')
+            )
+            last_pk = 0
+            while True:
+                batch = list(pending.filter(pk__gt=last_pk)[:options['batch_size']])
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+                with transaction.atomic(using=alias):
+                    for pk, name in batch:
+                        try:
+                            with default_storage.open(name, 'rb') as image:
+                                width, height = get_image_dimensions(image)
+                        except (IOError, OSError):
+                            missing += 1
+                            continue
+                        Profile.objects.using(alias).filter(pk=pk).update(
+                            avatar_width=width, avatar_height=height
+                        )
+                        filled += 1
+        self.stdout.write(
+            f"Stored dimensions for {filled} avatars; {missing} files missing."
+        )
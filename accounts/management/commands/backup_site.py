@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from project_7 import backup
+
+
+def sqlite_databases():
+    '''{alias: path} for every file-backed SQLite database.'''
+    return {
+        alias: database['NAME']
+        for alias, database in settings.DATABASES.items()
+        if database['ENGINE'].endswith('sqlite3') and
+        database['NAME'] != ':memory:'
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Snapshot the SQLite databases with the online backup API, without "
+        "stopping the site, plus the media files changed since the last "
+        "snapshot."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backup-dir', default=settings.BACKUP_DIR)
+        parser.add_argument(
+            '--pages', type=int, default=64,
+            help="Database pages copied per step; writers wait at most one step."
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0.005,
+            help="Seconds to pause between steps."
+        )
+
+    def handle(self, *args, **options):
+        manifest = backup.create_snapshot(
+            options['backup_dir'], sqlite_databases(), settings.MEDIA_ROOT,
+            pages=options['pages'], sleep=options['sleep']
+        )
+        self.stdout.write(
+            f"Snapshot {manifest['name']}: {len(manifest['databases'])} "
+            f"databases, {len(manifest['changed'])} media files changed, "
+            f"{len(manifest['removed'])} removed since "
+            f"{manifest['previous'] or 'the beginning'}."
+        )
@@ -0,0 +1,77 @@
+import random
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from ...models import month_day
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a scratch in-memory SQLite table with --profiles birthdays and "
+        "compare the birth_monthday index against scanning every birth date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=1000000)
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        connection = sqlite3.connect(':memory:')
+        connection.execute(
+            "CREATE TABLE profile (id INTEGER PRIMARY KEY, birth DATE, "
+            "birth_monthday SMALLINT)"
+        )
+        epoch = date(1940, 1, 1)
+        births = (
+            epoch + timedelta(days=random.randrange(365 * 70))
+            for _ in range(options['profiles'])
+        )
+        connection.executemany(
+            "INSERT INTO profile (birth, birth_monthday) VALUES (?, ?)",
+            ((birth.isoformat(), month_day(birth)) for birth in births)
+        )
+        connection.execute(
+            "CREATE INDEX profile_birth_monthday ON profile (birth_monthday)"
+        )
+
+        start = date(2019, 12, 28)
+        end = start + timedelta(days=options['days'])
+        first, last = month_day(start), month_day(end)
+        indexed_sql = (
+            "SELECT id FROM profile WHERE birth_monthday BETWEEN ? AND ?"
+            if first <= last else
+            "SELECT id FROM profile WHERE birth_monthday >= ? OR birth_monthday <= ?"
+        )
+
+        def indexed():
+            return len(connection.execute(indexed_sql, (first, last)).fetchall())
+
+        def scan():
+            # What the app had to do before: read every birth date.
+            matched = 0
+            for _, birth in connection.execute("SELECT id, birth FROM profile"):
+                value = month_day(datetime.strptime(birth, "%Y-%m-%d"))
+                if first <= value <= last if first <= last else (
+                    value >= first or value <= last
+                ):
+                    matched += 1
+            return matched
+
+        plan = connection.execute(
+            f"EXPLAIN QUERY PLAN {indexed_sql}", (first, last)
+        ).fetchall()
+        self.stdout.write(f"Query plan: {'; '.join(row[-1] for row in plan)}")
+        for name, query in (('indexed', indexed), ('full scan', scan)):
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                matched = query()
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(
+                f"{name:>9}: {matched} birthdays, best of {options['repeat']} "
+                f"{min(timings) * 1000:.1f} ms"
+            )
@@ -0,0 +1,59 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import reverse
+from django.test import Client
+
+from project_7 import compression
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the main pages and report the bytes and CPU time per "
+        "response for each compression encoding and level."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help="Also render profile and edit_profile signed in as this user."
+        )
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        client = Client(SERVER_NAME='localhost')
+        pages = ['home', 'accounts:sign_in', 'accounts:sign_up']
+        if options['user']:
+            try:
+                user = get_user_model()._default_manager.get_by_natural_key(
+                    options['user']
+                )
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user named {options['user']!r}.")
+            client.force_login(user)
+            pages += ['accounts:profile', 'accounts:edit_profile']
+
+        settings = [('gzip', level) for level in (1, 6, 9)]
+        if compression.brotli is not None:
+            settings += [('br', quality) for quality in (1, 4, 6, 11)]
+        else:
+            self.stdout.write("brotli is not installed; only gzip is measured.")
+
+        for name in pages:
+            response = client.get(reverse(name))
+            if response.status_code != 200:
+                self.stdout.write(f"{name}: HTTP {response.status_code}, skipped")
+                continue
+            body = response.content
+            self.stdout.write(f"{name}: {len(body)} bytes uncompressed")
+            for encoding, level in settings:
+                started = time.process_time()
+                for _ in range(options['repeat']):
+                    compress, _, finish = compression.compressor(encoding, level)
+                    size = len(compress(body) + finish())
+                cpu = (time.process_time() - started) / options['repeat']
+                self.stdout.write(
+                    f"  {encoding:>4} {level:>2}: {size:>6} bytes "
+                    f"({size / len(body):5.1%}), {cpu * 1e6:7.1f} us CPU"
+                )
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...cards import card_data, serialize
+from ...models import Profile, ProfileCard
+from ...sharding import all_shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare every profile card with the Profile and User rows it was "
+        "built from, and rebuild missing or stale cards in bulk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only report the drift."
+        )
+
+    def handle(self, *args, **options):
+        users = get_user_model()._default_manager
+        totals = {'missing': 0, 'stale': 0, 'orphaned': 0}
+        for alias in all_shards():
+            last_pk = 0
+            while True:
+                batch = list(
+                    Profile.objects.using(alias)
+                    .filter(pk__gt=last_pk).order_by('pk')
+                    [:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                owners = users.in_bulk([profile.user_id for profile in batch])
+                stored = dict(
+                    ProfileCard.objects.using(alias)
+                    .filter(pk__in=list(owners)).values_list('pk', 'data')
+                )
+                repairs = []
+                for profile in batch:
+                    owner = owners.get(profile.user_id)
+                    if owner is None:
+                        continue
+                    data = serialize(card_data(profile, owner))
+                    if stored.get(profile.user_id) == data:
+                        continue
+                    drift = 'stale' if profile.user_id in stored else 'missing'
+                    totals[drift] += 1
+                    repairs.append(ProfileCard(user_id=profile.user_id, data=data))
+                if repairs and not options['dry_run']:
+                    with transaction.atomic(using=alias):
+                        ProfileCard.objects.using(alias).filter(
+                            pk__in=[card.pk for card in repairs]
+                        ).delete()
+                        ProfileCard.objects.using(alias).bulk_create(repairs)
+
+            orphans = ProfileCard.objects.using(alias).exclude(
+                pk__in=Profile.objects.using(alias).values('user_id')
+            )
+            totals['orphaned'] += orphans.count()
+            if not options['dry_run']:
+                orphans.delete()
+
+        verb = "Would repair" if options['dry_run'] else "Repaired"
+        self.stdout.write(
+            f"{verb} {totals['missing']} missing and {totals['stale']} stale "
+            f"cards; {totals['orphaned']} orphaned cards "
+            f"{'found' if options['dry_run'] else 'removed'}."
+        )
@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...models import Profile
+from ...purge import walk_sorted
+from ...sharding import all_shards
+from ...thumbnails import derived_names
+
+
+CHECKPOINT_EVERY = 1000
+
+class Command(BaseCommand):
+    help = (
+        "Delete files under MEDIA_ROOT that no profile avatar or preview "
+        "references. Large trees can be scanned over several runs with "
+        "--max-files; progress is kept in a checkpoint file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', default=settings.MEDIA_ROOT)
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument(
+            '--max-files', type=int,
+            help="Stop after examining this many files; the next run resumes."
+        )
+        parser.add_argument(
+            '--throttle', type=float, default=0,
+            help="Seconds to sleep after each deletion."
+        )
+        parser.add_argument(
+            '--min-age-hours', type=float, default=24,
+            help="Leave files younger than this alone; their profile row "
+                 "may not be committed yet."
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.BASE_DIR, '.media_gc.json')
+        )
+        parser.add_argument('--restart', action='store_true')
+
+    def handle(self, *args, **options):
+        referenced = self._referenced(options['batch_size'])
+        resume_after = self._load_checkpoint(options)
+        newest_allowed = time.time() - options['min_age_hours'] * 3600
+
+        examined = orphans = reclaimed = 0
+        last_path = None
+        finished = True
+        for path, entry in walk_sorted(options['root'], resume_after):
+            if options['max_files'] and examined >= options['max_files']:
+                finished = False
+                break
+            # Saved by files examined, not files deleted: in a tree that is
+            # mostly referenced, a killed run must still keep its place.
+            if examined and examined % CHECKPOINT_EVERY == 0:
+                self._save_checkpoint(options, last_path)
+            examined += 1
+            last_path = path
+            if path in referenced or entry.name.startswith('.'):
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > newest_allowed:
+                continue
+            orphans += 1
+            reclaimed += stat.st_size
+            if not options['dry_run']:
+                os.remove(entry.path)
+                if options['throttle']:
+                    time.sleep(options['throttle'])
+
+        if finished:
+            if os.path.exists(options['checkpoint']):
+                os.remove(options['checkpoint'])
+        else:
+            self._save_checkpoint(options, last_path)
+
+        verb = "Would reclaim" if options['dry_run'] else "Reclaimed"
+        self.stdout.write(
+            f"Examined {examined} files; {orphans} orphaned. "
+            f"{verb} {reclaimed} bytes."
+        )
+        if not finished:
+            self.stdout.write(f"Stopped after {last_path}; run again to continue.")
+
+    def _referenced(self, batch_size):
+        '''Every stored name a profile points at, read from each shard in
+        primary-key chunks.'''
+        referenced = set()
+        for alias in all_shards():
+            avatars = (
+                Profile.objects.using(alias).exclude(avatar='')
+                .order_by('pk').values_list('pk', 'avatar')
+            )
+            last_pk = 0
+            while True:
+                batch = list(avatars.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+                for _, name in batch:
+                    referenced.add(name)
+                    # Every width: a missing avatar_width must not make
+                    # its resized copies look orphaned.
+                    referenced.update(derived_names(name))
+        return referenced
+
+    def _load_checkpoint(self, options):
+        if options['restart'] or not os.path.exists(options['checkpoint']):
+            return None
+        with open(options['checkpoint']) as checkpoint_file:
+            state = json.load(checkpoint_file)
+        if state['root'] != options['root']:
+            return None
+        self.stdout.write(f"Resuming after {state['last_path']}.")
+        return state['last_path']
+
+    def _save_checkpoint(self, options, last_path):
+        if options['dry_run'] or last_path is None:
+            return
+        temporary = f"{options['checkpoint']}.tmp"
+        with open(temporary, 'w') as checkpoint_file:
+            json.dump({'root': options['root'], 'last_path': last_path}, checkpoint_file)
+        os.replace(temporary, options['checkpoint'])
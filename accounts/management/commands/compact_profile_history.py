@@ -0,0 +1,64 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ...models import ProfileChange
+from ...history import merge_changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge each user's profile changes older than --days into a single "
+        "row, or drop them entirely with --drop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90)
+        parser.add_argument(
+            '--drop', action='store_true',
+            help="Delete expired changes instead of compacting them."
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = ProfileChange.objects.filter(changed_at__lt=cutoff)
+
+        if options['drop']:
+            deleted, _ = expired.delete()
+            self.stdout.write(f"Dropped {deleted} profile changes.")
+            return
+
+        user_ids = expired.order_by('user_id').values_list(
+            'user_id', flat=True
+        ).distinct()
+        compacted = 0
+        last_user_id = 0
+        while True:
+            batch = list(
+                user_ids.filter(user_id__gt=last_user_id)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_user_id = batch[-1]
+            for user_id in batch:
+                compacted += self._compact_user(expired.filter(user_id=user_id))
+        self.stdout.write(f"Compacted {compacted} profile changes.")
+
+    @transaction.atomic
+    def _compact_user(self, changes):
+        rows = list(changes.order_by('changed_at', 'pk'))
+        if len(rows) < 2:
+            return 0
+        merged = merge_changes(json.loads(row.changes) for row in rows)
+        changes.filter(pk__in=[row.pk for row in rows]).delete()
+        if merged:
+            ProfileChange.objects.create(
+                user_id=rows[-1].user_id,
+                changed_at=rows[-1].changed_at,
+                changes=json.dumps(merged, sort_keys=True)
+            )
+        return len(rows)
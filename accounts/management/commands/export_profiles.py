@@ -0,0 +1,39 @@
+import csv
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from ...models import Profile
+
+
+class Command(BaseCommand):
+    help = "Write every profile, gathered from all shards, as CSV."
+
+    fields = ('username', 'email', 'first_name', 'last_name', 'birth', 'bio', 'avatar')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        writer = csv.writer(self.stdout)
+        writer.writerow(self.fields)
+        batch = []
+        for profile in Profile.objects.scatter():
+            batch.append(profile)
+            if len(batch) >= options['batch_size']:
+                self._write_batch(writer, batch)
+                batch = []
+        self._write_batch(writer, batch)
+
+    def _write_batch(self, writer, profiles):
+        '''Users live on `default`, so each batch of shard rows is joined
+        to them with one IN query rather than a join per row.'''
+        users = get_user_model()._default_manager.in_bulk(
+            [profile.user_id for profile in profiles]
+        )
+        for profile in profiles:
+            user = users[profile.user_id]
+            writer.writerow([
+                user.username, user.email, user.first_name, user.last_name,
+                profile.birth, profile.bio, profile.avatar.name
+            ])
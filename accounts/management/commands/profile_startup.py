@@ -0,0 +1,65 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the WSGI application in fresh interpreters and report the "
+        "time spent in imports, django.setup() and the first request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='/accounts/sign_in/',
+            help="Path of the first request."
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--top', type=int, default=15)
+
+    def _run(self, path):
+        process = subprocess.run(
+            [sys.executable, '-m', 'project_7.startup', path],
+            cwd=settings.BASE_DIR, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, env=dict(
+                os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+                    'DJANGO_SETTINGS_MODULE', 'project_7.settings'
+                )
+            )
+        )
+        if process.returncode:
+            raise CommandError(process.stderr.decode(errors='replace'))
+        return json.loads(process.stdout.decode())
+
+    def handle(self, *args, **options):
+        runs = [self._run(options['path']) for _ in range(options['repeat'])]
+        # Import timings come from the run with the median total, so one
+        # cold disk cache does not skew the module list.
+        runs.sort(key=lambda run: sum(seconds for _, seconds in run['phases']))
+        median = runs[len(runs) // 2]
+
+        self.stdout.write(
+            f"{options['path']} -> {median['status']}; "
+            f"{len(median['modules'])} modules loaded"
+        )
+        for index, (name, _) in enumerate(median['phases']):
+            seconds = statistics.median(run['phases'][index][1] for run in runs)
+            self.stdout.write(f"  {seconds * 1000:8.1f} ms  {name}")
+        total = statistics.median(
+            sum(seconds for _, seconds in run['phases']) for run in runs
+        )
+        self.stdout.write(f"  {total * 1000:8.1f} ms  time to first response")
+
+        self.stdout.write(f"Slowest imports (cumulative / self ms):")
+        slowest = sorted(
+            median['imports'].items(), key=lambda item: item[1][0], reverse=True
+        )
+        for name, (cumulative, own) in slowest[:options['top']]:
+            self.stdout.write(
+                f"  {cumulative * 1000:8.1f} {own * 1000:8.1f}  {name}"
+            )
@@ -0,0 +1,113 @@
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from ...purge import (
+    batched, deactivate_users, delete_users, media_files, remove_media
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Deactivate, or with --delete remove, users in bounded batches. "
+        "Progress is checkpointed so an interrupted run picks up where it "
+        "stopped, including avatar files that were not removed yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*')
+        parser.add_argument(
+            '--inactive-days', type=int,
+            help="Select users who have not signed in for this many days."
+        )
+        parser.add_argument('--delete', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.BASE_DIR, '.purge_users.json')
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help="Ignore an existing checkpoint."
+        )
+
+    def handle(self, *args, **options):
+        users = self._select(options)
+        checkpoint = self._load_checkpoint(options)
+
+        removed = 0
+        if checkpoint['pending_media']:
+            removed += remove_media(checkpoint['pending_media'], options['workers'])
+            checkpoint['pending_media'] = []
+            self._save_checkpoint(options, checkpoint)
+
+        user_ids = users.filter(pk__gt=checkpoint['last_pk']).order_by('pk') \
+            .values_list('pk', flat=True)
+        processed = 0
+        for batch in batched(user_ids, options['batch_size']):
+            if options['delete']:
+                # Remember the file names before the profiles are gone.
+                checkpoint['pending_media'] = media_files(batch)
+                self._save_checkpoint(options, checkpoint)
+                delete_users(batch)
+            else:
+                deactivate_users(batch)
+            checkpoint['last_pk'] = batch[-1]
+            self._save_checkpoint(options, checkpoint)
+
+            if checkpoint['pending_media']:
+                removed += remove_media(
+                    checkpoint['pending_media'], options['workers']
+                )
+                checkpoint['pending_media'] = []
+                self._save_checkpoint(options, checkpoint)
+            processed += len(batch)
+
+        if os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+        verb = "Deleted" if options['delete'] else "Deactivated"
+        self.stdout.write(f"{verb} {processed} users; removed {removed} files.")
+
+    def _select(self, options):
+        users = get_user_model()._default_manager.filter(is_superuser=False)
+        if options['usernames']:
+            return users.filter(username__in=options['usernames'])
+        if options['inactive_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['inactive_days'])
+            return users.filter(
+                Q(last_login__lt=cutoff)
+                | Q(last_login__isnull=True, date_joined__lt=cutoff)
+            )
+        raise CommandError("Pass usernames or --inactive-days.")
+
+    def _load_checkpoint(self, options):
+        run = {
+            'usernames': sorted(options['usernames']),
+            'inactive_days': options['inactive_days'],
+            'delete': options['delete'],
+        }
+        state = {'run': run, 'last_pk': 0, 'pending_media': []}
+        if options['restart'] or not os.path.exists(options['checkpoint']):
+            return state
+        with open(options['checkpoint']) as checkpoint_file:
+            saved = json.load(checkpoint_file)
+        if saved['run'] != run:
+            raise CommandError(
+                "The checkpoint belongs to a run with different arguments; "
+                "pass --restart to discard it."
+            )
+        self.stdout.write(f"Resuming after user {saved['last_pk']}.")
+        return saved
+
+    def _save_checkpoint(self, options, state):
+        temporary = f"{options['checkpoint']}.tmp"
+        with open(temporary, 'w') as checkpoint_file:
+            json.dump(state, checkpoint_file)
+        os.replace(temporary, options['checkpoint'])
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models import Profile
+from ...sharding import all_shards, shard_for
+
+
+class Command(BaseCommand):
+    help = (
+        "Move profiles whose user now hashes to a different shard. Rows "
+        "move one transaction at a time, so the site stays up; "
+        "Profile.objects.for_user finds rows that have not moved yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only report how many rows would move."
+        )
+
+    def handle(self, *args, **options):
+        moved = 0
+        for alias in all_shards():
+            last_pk = 0
+            while True:
+                batch = list(
+                    Profile.objects.using(alias)
+                    .filter(pk__gt=last_pk).order_by('pk')
+                    [:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                for profile in batch:
+                    target = shard_for(profile.user_id)
+                    if target == alias:
+                        continue
+                    if not options['dry_run']:
+                        self._move(profile, alias, target)
+                    moved += 1
+        verb = "Would move" if options['dry_run'] else "Moved"
+        self.stdout.write(f"{verb} {moved} profiles.")
+
+    def _move(self, profile, source, target):
+        with transaction.atomic(using=target), transaction.atomic(using=source):
+            source_pk = profile.pk
+            profile.pk = None
+            profile.save(using=target, force_insert=True)
+            Profile.objects.using(source).filter(pk=source_pk).delete()
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from project_7 import backup
+
+from .backup_site import sqlite_databases
+
+
+class Command(BaseCommand):
+    help = (
+        "Restore the SQLite databases and MEDIA_ROOT from a snapshot taken "
+        "by backup_site. Stop the site first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'snapshot', nargs='?', help="Snapshot name; the latest by default."
+        )
+        parser.add_argument('--backup-dir', default=settings.BACKUP_DIR)
+
+    def handle(self, *args, **options):
+        names = backup.snapshots(options['backup_dir'])
+        name = options['snapshot'] or (names[-1] if names else None)
+        if name not in names:
+            raise CommandError(
+                f"No snapshot {name!r} in {options['backup_dir']}."
+                if name else f"No snapshots in {options['backup_dir']}."
+            )
+        databases = sqlite_databases()
+        missing = set(databases) - set(backup.read_manifest(
+            options['backup_dir'], name
+        )['databases'])
+        if missing:
+            raise CommandError(
+                f"Snapshot {name} has no copy of {', '.join(sorted(missing))}."
+            )
+        manifest = backup.restore_snapshot(
+            options['backup_dir'], name, databases, settings.MEDIA_ROOT
+        )
+        self.stdout.write(
+            f"Restored {len(databases)} databases and "
+            f"{len(manifest['media'])} media files from {name}."
+        )
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.9 on 2026-10-19 01:43
+from __future__ import unicode_literals
+
+import accounts.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_profilechange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='avatar',
+            field=accounts.models.StoredDimensionsImageField(blank=True, height_field='avatar_height', upload_to=accounts.models.image_file_path, width_field='avatar_width'),
+        ),
+    ]
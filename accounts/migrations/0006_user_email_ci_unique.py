@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    '''Case-insensitive unique index on auth_user.email so availability
+    checks and sign up validation are index lookups, not table scans.
+    Blank emails are allowed more than once.'''
+
+    dependencies = [
+        ('auth', '0007_alter_validators_add_error_messages'),
+        ('accounts', '0005_avatar_dimensions'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            ["CREATE UNIQUE INDEX accounts_user_email_ci "
+             "ON auth_user (LOWER(email)) WHERE email <> ''"],
+            ["DROP INDEX accounts_user_email_ci"],
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.9 on 2026-10-19 01:49
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_email_ci_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='birth_monthday',
+            field=models.PositiveSmallIntegerField(db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import defaultdict
+
+from django.db import migrations
+
+
+BATCH_SIZE = 2000
+
+
+def backfill_birth_monthday(apps, schema_editor):
+    '''Fill birth_monthday in primary-key batches, issuing one UPDATE per
+    distinct month/day in the batch rather than one per row.'''
+    Profile = apps.get_model('accounts', 'Profile')
+    profiles = Profile.objects.using(schema_editor.connection.alias)
+    pending = profiles.filter(birth_monthday__isnull=True).order_by('pk') \
+        .values_list('pk', 'birth')
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+        by_month_day = defaultdict(list)
+        for pk, birth in batch:
+            by_month_day[birth.month * 100 + birth.day].append(pk)
+        for month_day, pks in by_month_day.items():
+            profiles.filter(pk__in=pks).update(birth_monthday=month_day)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_profile_birth_monthday'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_birth_monthday, migrations.RunPython.noop,
+            hints={'model_name': 'profile'}
+        ),
+    ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.9 on 2026-10-19 01:53
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0008_backfill_birth_monthday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileCard',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile_card', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('data', models.TextField()),
+            ],
+        ),
+    ]
@@ -1,7 +1,25 @@
+import heapq
+from datetime import timedelta
+from itertools import chain, islice
+
 from django import forms
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
+from django.core.files.storage import default_storage
 from django.core.urlresolvers import reverse
+from django.utils import timezone
+
+from .sharding import all_shards, shard_for
+from .thumbnails import (
+    make_preview, make_resized, preview_name, resized_name, responsive_widths
+)
+
+
+def month_day(value):
+    '''Birthdays are indexed as MMDD, e.g. 1231, which sorts like the
+    day of the year and keeps 29 February between 28 February and 1 March.'''
+    return value.month * 100 + value.day
 
 
 def image_file_path(instance, filename):
@@ -9,6 +27,91 @@ def image_file_path(instance, filename):
     return f"{user}/{filename}"
 
 
+class StoredDimensionsImageField(models.ImageField):
+    '''ImageField that measures an image only when a new one is uploaded.
+
+    The stock field re-measures on every instantiation whose dimension
+    columns are empty, which opens the file just to load a row.'''
+
+    def update_dimension_fields(self, instance, force=False, *args, **kwargs):
+        if not force:
+            if self.attname not in instance.__dict__:
+                return
+            file = getattr(instance, self.attname)
+            if not file or file._committed:
+                return
+        super().update_dimension_fields(instance, True, *args, **kwargs)
+
+
+class ProfileManager(models.Manager):
+
+    def for_user(self, user):
+        '''Fetch `user`'s profile from its shard, falling back to the
+        other shards for rows a rebalance has not moved yet.'''
+        home = shard_for(user.pk)
+        try:
+            return self.using(home).get(user=user)
+        except self.model.DoesNotExist:
+            for alias in all_shards():
+                if alias == home:
+                    continue
+                try:
+                    return self.using(alias).get(user=user)
+                except self.model.DoesNotExist:
+                    continue
+            raise
+
+    def create(self, **kwargs):
+        '''`QuerySet.create` saves to the queryset's database, which knows
+        nothing of the owner; send unpinned creates to the user's shard.'''
+        user = kwargs.get('user')
+        user_id = kwargs.get('user_id', getattr(user, 'pk', None))
+        if self._db is None and user_id is not None:
+            return self.db_manager(shard_for(user_id)).create(**kwargs)
+        return super().create(**kwargs)
+
+    def upcoming_birthdays(self, days=7, start=None, limit=None):
+        '''Up to `limit` profiles whose birthday falls within `days` days
+        from `start` (today in the current time zone by default), soonest
+        first, gathered from every shard.
+
+        Each shard answers with a range scan on the birth_monthday index
+        and stops after `limit` rows; a window running past 31 December
+        becomes two ranges, read in calendar order. The sorted answers are
+        then merged.'''
+        start = start or timezone.localtime(timezone.now()).date()
+        end = start + timedelta(days=days)
+        first, last = month_day(start), month_day(end)
+        if first <= last and days < 365:
+            windows = [Q(birth_monthday__range=(first, last))]
+        else:
+            windows = [
+                Q(birth_monthday__gte=first),
+                Q(birth_monthday__lt=first, birth_monthday__lte=last),
+            ]
+
+        def soonest(profile):
+            return (profile.birth_monthday - first) % 10000, profile.user_id
+
+        def from_shard(alias):
+            ranges = (
+                self.using(alias).filter(window).order_by(
+                    'birth_monthday', 'user_id'
+                )[:limit]
+                for window in windows
+            )
+            return islice(chain.from_iterable(ranges), limit)
+
+        return list(islice(
+            heapq.merge(*map(from_shard, all_shards()), key=soonest), limit
+        ))
+
+    def scatter(self, **filters):
+        '''Yield matching profiles from every shard in turn.'''
+        for alias in all_shards():
+            yield from self.using(alias).filter(**filters).iterator()
+
+
 class Profile(models.Model):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
@@ -16,12 +119,85 @@ class Profile(models.Model):
     )
     birth = models.DateField()
     bio = models.TextField()
-    avatar = models.ImageField(upload_to=image_file_path, blank=True)
+    avatar = StoredDimensionsImageField(
+        upload_to=image_file_path, blank=True,
+        width_field='avatar_width', height_field='avatar_height'
+    )
+    avatar_width = models.PositiveIntegerField(null=True, editable=False)
+    avatar_height = models.PositiveIntegerField(null=True, editable=False)
+    birth_monthday = models.PositiveSmallIntegerField(
+        null=True, editable=False, db_index=True
+    )
+
+    objects = ProfileManager()
 
     def __str__(self):
         username = self.user.username
         return f"{self.__class__.__name__}: {username}"
 
+    def save(self, *args, **kwargs):
+        '''A freshly uploaded avatar gets its preview and resized copies
+        built once here, so pages never have to serve the full-size image.'''
+        new_avatar = bool(self.avatar) and not self.avatar._committed
+        self.birth_monthday = month_day(
+            self._meta.get_field('birth').to_python(self.birth)
+        )
+        super().save(*args, **kwargs)
+        if new_avatar:
+            make_preview(self.avatar)
+            make_resized(self.avatar)
+
     def get_absolute_url(self):
         profile_user = self.user.id
         return reverse('accounts:profile')
+
+    @property
+    def avatar_preview_url(self):
+        if not self.avatar:
+            return ''
+        return default_storage.url(preview_name(self.avatar.name))
+
+    @property
+    def avatar_resized(self):
+        '''[url, width] of each resized copy of the avatar, narrowest
+        first, worked out from the stored width.'''
+        if not (self.avatar and self.avatar_width):
+            return []
+        return [
+            [default_storage.url(resized_name(self.avatar.name, width)), width]
+            for width in responsive_widths(self.avatar_width)
+        ]
+
+
+class ProfileChange(models.Model):
+    '''One `edit_profile` submission, stored as {field: [old, new]}
+    for the fields that actually changed.'''
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='profile_changes'
+    )
+    changed_at = models.DateTimeField(db_index=True)
+    changes = models.TextField()
+
+    class Meta:
+        index_together = [('user', 'changed_at')]
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self.user_id} @ {self.changed_at}"
+
+
+class ProfileCard(models.Model):
+    '''Everything profile.html shows, copied from the Profile and User
+    rows as JSON so the page renders from one primary-key read. Cards
+    live on their profile's shard and are rebuilt by accounts.cards.'''
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='profile_card'
+    )
+    data = models.TextField()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self.user_id}"
@@ -0,0 +1,45 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+
+
+class EstimatedCountPaginator(Paginator):
+    '''Paginator that avoids a full COUNT(*) on large, unfiltered tables.
+
+    Filtered querysets and small tables are still counted exactly; for
+    anything else the table size is estimated from the planner statistics
+    (PostgreSQL) or from the highest primary key (other backends).'''
+
+    exact_count_threshold = 10000
+
+    def _get_count(self):
+        if self._count is None:
+            estimate = self._estimate_count()
+            if estimate is None or estimate < self.exact_count_threshold:
+                return super()._get_count()
+            self._count = estimate
+        return self._count
+    count = property(_get_count)
+
+    def _estimate_count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is None or query.where or query.distinct:
+            return None
+
+        model = queryset.model
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            return row[0] if row else None
+
+        highest_pk = (
+            model._default_manager.using(queryset.db)
+            .aggregate(highest_pk=Max('pk'))['highest_pk']
+        )
+        return highest_pk or 0
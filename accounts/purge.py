@@ -0,0 +1,135 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from posixpath import dirname, join
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .models import Profile, ProfileCard, ProfileChange
+from .sharding import all_shards
+from .thumbnails import derived_names
+
+
+def batched(user_ids, batch_size):
+    '''Yield lists of at most `batch_size` primary keys from `user_ids`,
+    an ordered values_list queryset, without ever loading all of them.'''
+    last_pk = 0
+    while True:
+        batch = list(user_ids.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        last_pk = batch[-1]
+        yield batch
+
+
+def deactivate_users(user_ids):
+    return get_user_model()._default_manager.filter(
+        pk__in=user_ids, is_active=True
+    ).update(is_active=False)
+
+
+def media_files(user_ids):
+    '''Storage names of the current avatars of `user_ids` and of the
+    previews and resized copies built from them, read from every shard.
+
+    Only these are removed. Paths built from usernames could point
+    anywhere (a user named "." is MEDIA_ROOT itself) and miss files
+    uploaded before a rename; avatars replaced earlier are left to
+    collect_orphaned_media.'''
+    names = []
+    for alias in all_shards():
+        avatars = Profile.objects.using(alias).filter(
+            user_id__in=user_ids
+        ).exclude(avatar='').values_list('avatar', 'avatar_width')
+        for name, width in avatars:
+            names.append(name)
+            names.extend(derived_names(name, width))
+    return names
+
+
+_purge = threading.local()
+
+
+def purge_in_progress():
+    '''True while delete_users runs in this thread; the per-row delete
+    receivers in accounts.signals then leave the shards to it.'''
+    return getattr(_purge, 'active', False)
+
+
+def delete_users(user_ids):
+    '''Delete one batch of users, their profiles and their cards with
+    set-based queries, on every shard.'''
+    users = get_user_model()._default_manager.filter(pk__in=user_ids)
+    _purge.active = True
+    try:
+        with transaction.atomic():
+            for alias in all_shards():
+                with transaction.atomic(using=alias):
+                    ProfileCard.objects.using(alias).filter(
+                        user_id__in=user_ids
+                    ).delete()
+                    Profile.objects.using(alias).filter(
+                        user_id__in=user_ids
+                    ).delete()
+            ProfileChange.objects.filter(user_id__in=user_ids).delete()
+            users.delete()
+    finally:
+        _purge.active = False
+
+
+def walk_sorted(root, resume_after=None, relative=''):
+    '''Yield (relative path, DirEntry) for every file below `root` in a
+    stable, sorted order, skipping everything up to and including
+    `resume_after` so a scan can continue where an earlier run stopped.'''
+    resume_parts = resume_after.split('/') if resume_after else None
+    try:
+        with os.scandir(os.path.join(root, relative)) as entries:
+            entries = sorted(entries, key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        path = join(relative, entry.name) if relative else entry.name
+        parts = path.split('/')
+        if entry.is_dir(follow_symlinks=False):
+            if resume_parts and parts < resume_parts[:len(parts)]:
+                continue
+            inner_resume = resume_after if (
+                resume_parts and parts == resume_parts[:len(parts)]
+            ) else None
+            yield from walk_sorted(root, inner_resume, path)
+        elif not resume_parts or parts > resume_parts:
+            yield path, entry
+
+
+def _remove_empty_dirs(directory, storage):
+    '''Remove `directory` and its parents while they are empty, stopping
+    short of the storage root. Storage without local paths has no
+    directories to clean up.'''
+    try:
+        root = os.path.normpath(storage.path(''))
+        while directory:
+            path = os.path.normpath(storage.path(directory))
+            if path == root or not path.startswith(root + os.sep):
+                return
+            os.rmdir(path)
+            directory = dirname(directory)
+    except (NotImplementedError, OSError):
+        return
+
+
+def remove_media(names, workers=4, storage=default_storage):
+    '''Delete the given storage names on a thread pool, then any
+    directories that left empty. Returns the number of files removed.'''
+    def remove(name):
+        if not storage.exists(name):
+            return 0
+        storage.delete(name)
+        return 1
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        removed = sum(pool.map(remove, names))
+    for directory in sorted({dirname(name) for name in names}, reverse=True):
+        _remove_empty_dirs(directory, storage)
+    return removed
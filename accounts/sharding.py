@@ -0,0 +1,63 @@
+from django.conf import settings
+
+
+SHARDED_MODELS = {'profile', 'profilecard'}
+
+
+def jump_hash(key, num_buckets):
+    '''Jump consistent hash (Lamping & Veach): growing from n to n + 1
+    buckets only moves about 1 / (n + 1) of the keys.'''
+    bucket, jump = -1, 0
+    while jump < num_buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def all_shards():
+    return list(getattr(settings, 'PROFILE_SHARDS', ['default']))
+
+
+def shard_for(user_id):
+    shards = all_shards()
+    return shards[jump_hash(int(user_id), len(shards))]
+
+
+def is_sharded(model):
+    opts = model._meta.concrete_model._meta
+    return opts.app_label == 'accounts' and opts.model_name in SHARDED_MODELS
+
+
+class ProfileShardRouter:
+    '''Route sharded accounts models by the id of the user they belong to.
+
+    Everything else lives on `default`, including User, so following a
+    relation out of a shard always lands back there.'''
+
+    def _db_for(self, model, **hints):
+        if not is_sharded(model):
+            return 'default'
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        if is_sharded(instance.__class__):
+            if instance._state.db:
+                # Existing rows stay where they are until rebalanced.
+                return instance._state.db
+            return shard_for(instance.user_id) if instance.user_id else None
+        # Reverse access from the owning user, e.g. `user.profile`.
+        return shard_for(instance.pk) if instance.pk else None
+
+    db_for_read = _db_for
+    db_for_write = _db_for
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded(type(obj1)) or is_sharded(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'accounts' and model_name in SHARDED_MODELS:
+            return db in all_shards()
+        return db == 'default'
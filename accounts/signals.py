@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from project_7 import metrics
+
+from .availability import index
+from .cards import CARD_USER_FIELDS, rebuild_card
+from .models import Profile, ProfileCard
+from .purge import purge_in_progress
+from .sharding import all_shards
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def delete_sharded_profile(sender, instance, using, **kwargs):
+    '''The ORM cascade only reaches the database the user was deleted
+    from; clear the profile from any other shard as well.'''
+    if purge_in_progress():
+        return
+    for alias in all_shards():
+        if alias != using:
+            Profile.objects.using(alias).filter(user_id=instance.pk).delete()
+            ProfileCard.objects.using(alias).filter(user_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def index_user_names(sender, instance, **kwargs):
+    index.add(instance.username, instance.email)
+
+
+@receiver(post_save, sender=Profile)
+def rebuild_profile_card(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        rebuild_card(instance, using=using)
+
+
+@receiver(post_delete, sender=Profile)
+def delete_profile_card(sender, instance, using, **kwargs):
+    if purge_in_progress():
+        return
+    ProfileCard.objects.using(using).filter(user_id=instance.user_id).delete()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def rebuild_user_card(sender, instance, created, update_fields=None,
+                      raw=False, **kwargs):
+    '''Sign ins only touch last_login, which no card shows.'''
+    if created or raw or (update_fields and
+                          not CARD_USER_FIELDS.intersection(update_fields)):
+        return
+    try:
+        profile = Profile.objects.for_user(instance)
+    except Profile.DoesNotExist:
+        return
+    rebuild_card(profile, instance)
+
+
+@receiver(user_logged_in)
+def count_sign_in(sender, **kwargs):
+    metrics.SIGN_INS.inc()
+
+
+@receiver(user_login_failed)
+def count_failed_login(sender, **kwargs):
+    metrics.FAILED_LOGINS.inc()
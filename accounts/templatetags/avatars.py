@@ -0,0 +1,72 @@
+import math
+
+from django import template
+from django.utils.html import format_html
+
+from ..thumbnails import preview_dimensions
+
+
+register = template.Library()
+
+# .img_block on profile.html: 80% of the 1080px wide .bounds.
+LAYOUT_FRACTION = 0.8
+LAYOUT_MAX_WIDTH = 864
+
+
+def default_sizes(width):
+    '''The width the profile layout shows an avatar `width` pixels wide
+    at: 80% of the viewport, but no more than the layout or the image.'''
+    shown = min(width, LAYOUT_MAX_WIDTH)
+    return f"(max-width: {math.ceil(shown / LAYOUT_FRACTION)}px) 80vw, {shown}px"
+
+
+def _img(url, preview_url, resized, width, height, css_class, sizes):
+    if not (width and height):
+        return format_html(
+            '<img class="{}" src="{}" loading="lazy" decoding="async" alt="">',
+            css_class, url
+        )
+
+    preview_width, _ = preview_dimensions(width, height)
+    candidates = [tuple(candidate) for candidate in resized]
+    if preview_width < width:
+        candidates.insert(0, (preview_url(), preview_width))
+    candidates.append((url, width))
+    srcset = ', '.join(
+        f"{candidate_url} {candidate_width}w"
+        for candidate_url, candidate_width in candidates
+    )
+    if sizes is None:
+        sizes = default_sizes(width)
+    return format_html(
+        '<img class="{}" src="{}" srcset="{}" sizes="{}" width="{}" '
+        'height="{}" loading="lazy" decoding="async" alt="">',
+        css_class, url, srcset, sizes, width, height
+    )
+
+
+@register.simple_tag
+def avatar_img(profile, css_class='', sizes=None):
+    '''Render `profile`'s avatar as a lazily loaded, responsive <img>.
+
+    Dimensions come from the stored avatar_width/avatar_height columns,
+    so rendering never opens the image file.'''
+    if not profile.avatar:
+        return ''
+    return _img(
+        profile.avatar.url, lambda: profile.avatar_preview_url,
+        profile.avatar_resized, profile.avatar_width, profile.avatar_height,
+        css_class, sizes
+    )
+
+
+@register.simple_tag
+def card_avatar_img(card, css_class='', sizes=None):
+    '''`avatar_img` for the values of a profile card.'''
+    if not card['avatar_url']:
+        return ''
+    return _img(
+        card['avatar_url'], lambda: card['avatar_preview_url'],
+        card.get('avatar_resized', []), card['avatar_width'],
+        card['avatar_height'], css_class, sizes
+    )
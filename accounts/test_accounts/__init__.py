@@ -0,0 +1,9 @@
+import shutil
+from tempfile import mkdtemp
+
+
+def temporary_directory(test_case):
+    '''A new directory that is removed when `test_case` finishes.'''
+    path = mkdtemp()
+    test_case.addCleanup(shutil.rmtree, path, ignore_errors=True)
+    return path
@@ -0,0 +1,240 @@
+import json
+from os.path import join, dirname, exists
+
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.auth.models import Permission, User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage, FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from . import temporary_directory
+from ..models import Profile, ProfileCard
+from ..paginator import EstimatedCountPaginator
+from ..purge import delete_users, remove_media
+from ..thumbnails import preview_name
+
+
+class ProfileChangeListView(TestCase):
+    '''Verify that the Profile changelist renders avatar previews
+    instead of the full-size avatar.'''
+
+    multi_db = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(
+            'admin', 'admin@email.com', '*Dh&M3h36v*$J*'
+        )
+        with open(join(dirname(__file__), 'images/test_image.jpg'), 'rb') as image:
+            cls.profile = Profile.objects.create(
+                user=cls.admin_user,
+                birth='2019-01-01',
+                bio='A little info about me...',
+                avatar=SimpleUploadedFile(
+                    'test_image.jpg', image.read(), content_type="image/jpeg"
+                )
+            )
+
+    def test_changelist_uses_preview(self):
+        self.client.force_login(self.admin_user)
+        response = self.client.get(
+            reverse('admin:accounts_profile_changelist')
+        )
+        self.assertContains(response, self.profile.avatar_preview_url)
+        self.assertNotContains(response, f'src="{self.profile.avatar.url}"')
+
+    def test_search_matches_exact_username(self):
+        self.client.force_login(self.admin_user)
+        response = self.client.get(
+            reverse('admin:accounts_profile_changelist'), {'q': 'admin'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+class EstimatedCountPaginatorTestCase(TestCase):
+    '''Verify that small or filtered querysets are counted exactly.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        for username in ('first_user', 'second_user'):
+            User.objects.create_user(username)
+
+    def test_small_table_counts_exactly(self):
+        paginator = EstimatedCountPaginator(User.objects.all(), 10)
+        self.assertEqual(paginator.count, 2)
+
+    def test_large_table_is_estimated(self):
+        paginator = EstimatedCountPaginator(User.objects.all(), 10)
+        paginator.exact_count_threshold = 0
+        highest_pk = User.objects.order_by('-pk')[0].pk
+        self.assertEqual(paginator.count, highest_pk)
+
+
+class PurgeUsersTestCase(TestCase):
+    '''Verify that users are deactivated or deleted in batches together
+    with their profiles and avatar files, and that runs resume.'''
+
+    multi_db = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(
+            'admin', 'admin@email.com', '*Dh&M3h36v*$J*'
+        )
+        cls.users = [User.objects.create_user(f"testuser{n}") for n in range(3)]
+
+    def setUp(self):
+        with open(join(dirname(__file__), 'images/test_image.jpg'), 'rb') as image:
+            content = image.read()
+        self.avatars = [
+            Profile.objects.create(
+                user=user, birth='2019-01-01', bio='A little about me...',
+                avatar=SimpleUploadedFile('test_image.jpg', content)
+            ).avatar.name
+            for user in self.users
+        ]
+        self.checkpoint = join(temporary_directory(self), 'checkpoint.json')
+
+    def test_deactivate_command(self):
+        call_command(
+            'purge_users', 'testuser0', 'testuser1', batch_size=1,
+            checkpoint=self.checkpoint, stdout=StringIO()
+        )
+        self.assertEqual(
+            User.objects.filter(is_active=False).count(), 2
+        )
+
+    def test_delete_users_is_set_based(self):
+        user_ids = [user.pk for user in self.users]
+        with CaptureQueriesContext(connections['default']) as default, \
+                CaptureQueriesContext(connections['profiles_1']) as shard:
+            delete_users(user_ids)
+        # One statement per table and shard, whatever the batch size: no
+        # post_delete receiver goes back to the shards for each user.
+        self.assertEqual(len(shard), 5)
+        self.assertEqual(len(default), 16)
+        self.assertFalse(ProfileCard.objects.using('profiles_1').exists())
+        self.assertFalse(User.objects.filter(pk__in=user_ids).exists())
+
+    def test_delete_command_removes_profiles_and_media(self):
+        call_command(
+            'purge_users', 'testuser0', 'testuser1', delete=True,
+            batch_size=1, checkpoint=self.checkpoint, stdout=StringIO()
+        )
+        self.assertFalse(User.objects.filter(username='testuser0').exists())
+        remaining = list(Profile.objects.scatter())
+        self.assertEqual([p.user_id for p in remaining], [self.users[2].pk])
+        for name in self.avatars[:2]:
+            self.assertFalse(default_storage.exists(name))
+            self.assertFalse(default_storage.exists(preview_name(name)))
+        self.assertTrue(default_storage.exists(self.avatars[2]))
+        self.assertFalse(exists(self.checkpoint))
+
+    def test_interrupted_run_resumes(self):
+        with open(self.checkpoint, 'w') as checkpoint:
+            json.dump({
+                'run': {'usernames': ['testuser0', 'testuser1'],
+                        'inactive_days': None, 'delete': True},
+                'last_pk': self.users[0].pk,
+                'pending_media': [
+                    self.avatars[0], preview_name(self.avatars[0])
+                ],
+            }, checkpoint)
+        output = StringIO()
+        call_command(
+            'purge_users', 'testuser0', 'testuser1', delete=True,
+            checkpoint=self.checkpoint, stdout=output
+        )
+        self.assertIn("Resuming", output.getvalue())
+        self.assertFalse(default_storage.exists(self.avatars[0]))
+        self.assertTrue(User.objects.filter(username='testuser0').exists())
+        self.assertFalse(User.objects.filter(username='testuser1').exists())
+
+    def test_admin_delete_action_asks_first(self):
+        self.client.force_login(self.admin_user)
+        url = reverse('admin:auth_user_changelist')
+        data = {
+            'action': 'delete_selected_with_media',
+            '_selected_action': [self.users[0].pk],
+        }
+        response = self.client.post(url, data)
+        self.assertContains(response, "Delete 1 users")
+        self.assertTrue(User.objects.filter(pk=self.users[0].pk).exists())
+
+        response = self.client.post(url, {**data, 'post': 'yes'})
+        self.assertFalse(User.objects.filter(pk=self.users[0].pk).exists())
+        self.assertTrue(LogEntry.objects.filter(
+            object_id=str(self.users[0].pk), action_flag=DELETION
+        ).exists())
+
+    def test_admin_delete_action_needs_delete_permission(self):
+        staff = User.objects.create_user(
+            'staff', password='*Dh&M3h36v*$J*', is_staff=True
+        )
+        staff.user_permissions.add(
+            Permission.objects.get(codename='change_user')
+        )
+        self.client.force_login(staff)
+        response = self.client.post(reverse('admin:auth_user_changelist'), {
+            'action': 'delete_selected_with_media',
+            '_selected_action': [self.users[0].pk],
+            'post': 'yes',
+        })
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(User.objects.filter(pk=self.users[0].pk).exists())
+
+
+class RemoveMediaTestCase(SimpleTestCase):
+    '''Verify that only the named files go, along with directories
+    they leave empty.'''
+
+    def test_removes_named_files_and_empty_directories(self):
+        storage = FileSystemStorage(location=temporary_directory(self))
+        for name in ('testuser/a.jpg', 'testuser/old/b.jpg', 'other/c.jpg'):
+            storage.save(name, ContentFile(b'image'))
+
+        self.assertEqual(
+            remove_media(['testuser/a.jpg', 'testuser/old/b.jpg'], storage=storage),
+            2
+        )
+        self.assertFalse(storage.exists('testuser'))
+        self.assertTrue(storage.exists('other/c.jpg'))
+
+
+class PurgeAwkwardUsernames(TestCase):
+    '''Verify that deleting users named like media directories only
+    removes their own files.'''
+
+    multi_db = True
+
+    def test_dot_and_previews_usernames(self):
+        with open(join(dirname(__file__), 'images/test_image.jpg'), 'rb') as image:
+            content = image.read()
+        with override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=temporary_directory(self)
+        ):
+            profiles = {}
+            for username in ('.', 'previews', 'keeper'):
+                profiles[username] = Profile.objects.create(
+                    user=User.objects.create_user(username),
+                    birth='2019-01-01', bio='A little about me...',
+                    avatar=SimpleUploadedFile(f'{username}.jpg', content)
+                )
+            call_command(
+                'purge_users', '.', 'previews', delete=True,
+                checkpoint=join(temporary_directory(self), 'checkpoint.json'), stdout=StringIO()
+            )
+            kept = profiles['keeper'].avatar.name
+            self.assertTrue(default_storage.exists(kept))
+            self.assertTrue(default_storage.exists(preview_name(kept)))
+            for username in ('.', 'previews'):
+                self.assertFalse(
+                    default_storage.exists(profiles[username].avatar.name)
+                )
@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import threading
+from os.path import exists, join
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.utils.six import StringIO
+
+from project_7 import backup
+
+from . import temporary_directory
+from ..management.commands import backup_site, restore_site
+
+
+def make_database(path, rows):
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)")
+        connection.executemany(
+            "INSERT INTO item (name) VALUES (?)",
+            ((f"item {number} " * 20,) for number in range(rows))
+        )
+    connection.close()
+
+
+def read_items(path):
+    connection = sqlite3.connect(path)
+    try:
+        return [row[0] for row in connection.execute("SELECT id FROM item")]
+    finally:
+        connection.close()
+
+
+class OnlineBackup(SimpleTestCase):
+    '''Verify that a copy taken while another connection writes is
+    still a consistent database.'''
+
+    def test_copy_during_writes(self):
+        directory = temporary_directory(self)
+        source = join(directory, 'source.sqlite3')
+        target = join(directory, 'copy.sqlite3')
+        make_database(source, 2000)
+
+        def write():
+            connection = sqlite3.connect(source, timeout=5)
+            for number in range(50):
+                with connection:
+                    connection.execute(
+                        "INSERT INTO item (name) VALUES (?)", (f"new {number}",)
+                    )
+            connection.close()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        backup.copy_database(source, target, pages=4, sleep=0.001)
+        writer.join()
+
+        items = read_items(target)
+        self.assertGreaterEqual(len(items), 2000)
+        self.assertEqual(items, list(range(1, len(items) + 1)))
+
+
+class BackupAndRestore(SimpleTestCase):
+    '''Verify that snapshots only copy changed media and that restoring
+    puts databases and media back exactly.'''
+
+    def setUp(self):
+        self.media, self.backups = temporary_directory(self), temporary_directory(self)
+        self.database = join(temporary_directory(self), 'db.sqlite3')
+        make_database(self.database, 10)
+        self.write_media('testuser/avatar.jpg', b'first')
+        for command in (backup_site, restore_site):
+            patcher = mock.patch.object(
+                command, 'sqlite_databases',
+                return_value={'default': self.database}
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write_media(self, name, content):
+        path = join(self.media, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as media_file:
+            media_file.write(content)
+
+    def run_command(self, name, *args):
+        output = StringIO()
+        with override_settings(MEDIA_ROOT=self.media):
+            call_command(name, *args, backup_dir=self.backups, stdout=output)
+        return output.getvalue()
+
+    def test_round_trip(self):
+        self.assertIn("1 media files changed", self.run_command('backup_site'))
+        first = backup.snapshots(self.backups)[-1]
+
+        self.write_media('otheruser/avatar.jpg', b'second')
+        os.remove(join(self.media, 'testuser/avatar.jpg'))
+        connection = sqlite3.connect(self.database)
+        with connection:
+            connection.execute("DELETE FROM item WHERE id > 5")
+        connection.close()
+        self.assertIn(
+            "1 media files changed, 1 removed", self.run_command('backup_site')
+        )
+        self.assertIn(
+            "0 media files changed, 0 removed", self.run_command('backup_site')
+        )
+
+        self.run_command('restore_site', first)
+        self.assertEqual(read_items(self.database), list(range(1, 11)))
+        self.assertTrue(exists(join(self.media, 'testuser/avatar.jpg')))
+        self.assertFalse(exists(join(self.media, 'otheruser/avatar.jpg')))
+
+        self.run_command('restore_site')
+        self.assertEqual(read_items(self.database), list(range(1, 6)))
+        self.assertFalse(exists(join(self.media, 'testuser/avatar.jpg')))
+        with open(join(self.media, 'otheruser/avatar.jpg'), 'rb') as media_file:
+            self.assertEqual(media_file.read(), b'second')
+
+    def test_bad_copy_restores_nothing(self):
+        other = join(temporary_directory(self), 'other.sqlite3')
+        make_database(other, 3)
+        databases = {'default': self.database, 'other': other}
+        manifest = backup.create_snapshot(self.backups, databases, self.media)
+        corrupt = join(self.backups, manifest['name'], 'other.sqlite3.gz')
+        with open(corrupt, 'wb') as copy:
+            copy.write(b'')
+        connection = sqlite3.connect(self.database)
+        with connection:
+            connection.execute("DELETE FROM item WHERE id > 5")
+        connection.close()
+
+        with self.assertRaises(sqlite3.DatabaseError):
+            backup.restore_snapshot(
+                self.backups, manifest['name'], databases, self.media
+            )
+        self.assertEqual(read_items(self.database), list(range(1, 6)))
+        self.assertFalse(exists(f"{self.database}.restoring"))
+
+    def test_failed_snapshot_leaves_nothing_behind(self):
+        with mock.patch.object(backup, 'media_state', side_effect=OSError):
+            with self.assertRaises(OSError):
+                backup.create_snapshot(
+                    self.backups, {'default': self.database}, self.media
+                )
+        self.assertEqual(os.listdir(self.backups), [])
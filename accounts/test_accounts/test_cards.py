@@ -0,0 +1,83 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from ..cards import load_card
+from ..models import Profile, ProfileCard
+from ..sharding import shard_for
+
+
+class ProfileCards(TestCase):
+    '''Verify that cards follow Profile and User saves, that the profile
+    page renders from the card alone, and that the checker repairs drift.'''
+
+    multi_db = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = User.objects.create_user(
+            'testuser', email='test@email.com', password='*Dh&M3h36v*$J*',
+            first_name='Test', last_name='User'
+        )
+        cls.profile = Profile.objects.create(
+            user=cls.test_user, birth='2019-01-01', bio='Hello World!'
+        )
+
+    def cards(self, user_id):
+        return ProfileCard.objects.using(shard_for(user_id)).filter(pk=user_id)
+
+    def test_card_follows_saves(self):
+        self.assertEqual(load_card(self.test_user)['bio'], 'Hello World!')
+
+        self.profile.bio = 'Goodbye!'
+        self.profile.save()
+        self.test_user.first_name = 'Renamed'
+        self.test_user.save()
+        card = load_card(self.test_user)
+        self.assertEqual(card['bio'], 'Goodbye!')
+        self.assertEqual(card['full_name'], 'Renamed User')
+
+    def test_sign_in_does_not_rebuild(self):
+        self.cards(self.test_user.pk).update(data='{"bio": "kept"}')
+        self.client.login(username='testuser', password='*Dh&M3h36v*$J*')
+        self.assertEqual(load_card(self.test_user), {'bio': 'kept'})
+
+    def test_profile_page_reads_only_the_card(self):
+        self.client.login(username='testuser', password='*Dh&M3h36v*$J*')
+        with mock.patch.object(
+            Profile.objects, 'for_user', side_effect=AssertionError
+        ):
+            response = self.client.get(reverse('accounts:profile'))
+        self.assertContains(response, 'Test User')
+        self.assertContains(response, 'test@email.com')
+
+    def test_missing_card_is_rebuilt_on_view(self):
+        self.cards(self.test_user.pk).delete()
+        self.client.login(username='testuser', password='*Dh&M3h36v*$J*')
+        response = self.client.get(reverse('accounts:profile'))
+        self.assertContains(response, 'Hello World!')
+        self.assertIsNotNone(load_card(self.test_user))
+
+    def test_checker_repairs_drift(self):
+        other = User.objects.create_user('otheruser')
+        Profile.objects.create(user=other, birth='2019-01-01', bio='Other')
+        self.cards(self.test_user.pk).update(data='{}')
+        self.cards(other.pk).delete()
+        ProfileCard.objects.using(shard_for(999)).create(user_id=999, data='{}')
+
+        output = StringIO()
+        call_command('check_profile_cards', dry_run=True, stdout=output)
+        self.assertIn(
+            "Would repair 1 missing and 1 stale cards; 1 orphaned cards found",
+            output.getvalue()
+        )
+
+        call_command('check_profile_cards', stdout=StringIO())
+        self.assertEqual(load_card(self.test_user)['bio'], 'Hello World!')
+        self.assertEqual(json.loads(self.cards(other.pk).get().data)['bio'], 'Other')
+        self.assertFalse(self.cards(999).exists())
@@ -0,0 +1,89 @@
+import gzip
+from unittest import mock, skipIf
+
+from django.core.urlresolvers import reverse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from project_7 import compression
+
+
+class NegotiateEncoding(SimpleTestCase):
+
+    def test_gzip_only(self):
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual(
+                compression.accepted_encoding('gzip, deflate, br'), 'gzip'
+            )
+            self.assertIsNone(compression.accepted_encoding('br'))
+
+    def test_refused_and_weighted(self):
+        self.assertIsNone(compression.accepted_encoding('gzip;q=0'))
+        self.assertIsNone(compression.accepted_encoding(''))
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual(compression.accepted_encoding('*;q=0.5'), 'gzip')
+
+    @skipIf(compression.brotli is None, "brotli is not installed")
+    def test_brotli_preferred(self):
+        self.assertEqual(compression.accepted_encoding('gzip, br'), 'br')
+        self.assertEqual(
+            compression.accepted_encoding('gzip, br;q=0.5'), 'gzip'
+        )
+
+
+class CompressResponses(TestCase):
+    '''Verify which responses are compressed and that the bodies still
+    decode to the original.'''
+
+    def setUp(self):
+        self.middleware = compression.CompressionMiddleware()
+        self.factory = RequestFactory(HTTP_ACCEPT_ENCODING='gzip')
+
+    def test_sign_in_page(self):
+        with mock.patch.object(compression, 'brotli', None):
+            response = self.client.get(
+                reverse('accounts:sign_in'), HTTP_ACCEPT_ENCODING='gzip'
+            )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn(b'csrfmiddlewaretoken', gzip.decompress(response.content))
+
+    def test_small_response_left_alone(self):
+        response = self.middleware.process_response(
+            self.factory.get('/'), HttpResponse('Hello World!')
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'Hello World!')
+
+    def test_streaming_response(self):
+        chunks = [b'Hello World! ' * 10, b'', b'Goodbye! ' * 10]
+        with mock.patch.object(compression, 'brotli', None):
+            response = self.middleware.process_response(
+                self.factory.get('/'), StreamingHttpResponse(iter(chunks))
+            )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            b''.join(chunks)
+        )
+
+    def test_cross_site_csrf_page_not_compressed(self):
+        response = self.client.get(
+            reverse('accounts:sign_in'), HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_SEC_FETCH_SITE='cross-site'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn(b'csrfmiddlewaretoken', response.content)
+
+        response = self.client.get(
+            reverse('accounts:sign_in'), HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_REFERER='https://attacker.example/'
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_csrf_page_is_padded(self):
+        request = self.factory.get('/')
+        request.META['CSRF_COOKIE_USED'] = True
+        with mock.patch.object(compression._random, 'randint', return_value=20):
+            padding = self.middleware._padding(request, HttpResponse())
+        self.assertRegex(padding, rb'^<!-- [a-zA-Z0-9]{20} -->$')
@@ -7,7 +7,9 @@ from django.contrib.auth.forms import PasswordChangeForm
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 
-from ..validate import validate_bio, validate_date
+from ..validate import (
+    PERSONAL_INFO_MSG, PersonalInfoValidator, validate_bio, validate_date
+)
 from .. import models
 from ..forms import UserAccountCreationForm, ProfileForm
 
@@ -142,11 +144,14 @@ class ValidatePasswordCharacters(TestCase):
     '''Verify that a submitted password that meets character
     requirements is set as the user's new password.'''
 
-    def setUp(self):
-        self.test_user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = User.objects.create_user(
             username='testuser',
             password='d8&3h2jv739841#'
         )
+
+    def setUp(self):
         self.new_password = {
             'old_password':  'd8&3h2jv739841#',
             'new_password1': 'k*$ug3E(dfbf^jyo',
@@ -204,3 +209,42 @@ class ValidatePasswordCharacters(TestCase):
             "at least one digit" in error.message for error in form_errors
         )
         self.assertTrue(digit_error)
+
+
+class ValidatePersonalInfo(TestCase):
+    '''Verify that passwords containing or resembling the user's
+    personal information are rejected, at sign up as well.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = User(
+            username='testuser', first_name='Marigold', last_name='Ng',
+            email='flower@email.com'
+        )
+
+    def assertRejected(self, password, code):
+        with self.assertRaises(ValidationError) as error:
+            PersonalInfoValidator().validate(password, self.test_user)
+        self.assertEqual(error.exception.code, code)
+
+    def test_contains_name_in_any_case(self):
+        for password in ('xMARIGOLD#9k2pq', 'TestUser#9k2pq1', 'q#1marigOld'):
+            self.assertRejected(password, 'password_contains_personal_info')
+
+    def test_short_names_ignored(self):
+        PersonalInfoValidator().validate('Ng#9k2pq1Zx7', self.test_user)
+
+    def test_similar_to_email(self):
+        self.assertRejected('flowers@email', 'password_too_similar')
+
+    def test_sign_up_checks_names(self):
+        form = UserAccountCreationForm({
+            'username': 'newuser',
+            'first_name': 'Marigold',
+            'last_name': 'Ng',
+            'email': 'new@email.com',
+            'verify_email': 'new@email.com',
+            'password1': 'Marigold8#Axyzqr',
+            'password2': 'Marigold8#Axyzqr'
+        })
+        self.assertIn(PERSONAL_INFO_MSG, form.errors['password2'])
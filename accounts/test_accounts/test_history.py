@@ -0,0 +1,126 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.db import DatabaseError
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from .. import history
+from ..models import Profile, ProfileChange
+
+
+class ProfileHistoryTestCase(TestCase):
+    '''Verify that edits to a profile are buffered as diffs and
+    can be replayed backwards to an earlier point in time.'''
+
+    multi_db = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = User.objects.create_user(
+            username="testuser",
+            password='*Dh&M3h36v*$J*',
+            first_name='test_fn'
+        )
+        Profile.objects.create(
+            user=cls.test_user,
+            birth="2019-01-01",
+            bio="A little info about me..."
+        )
+        cls.edit_data = {
+            'first_name': 'edited_fn',
+            'last_name': '',
+            'email': '',
+            'birth': "2019-01-01",
+            'bio': "Lorem ipsum dolor sit amet"
+        }
+
+    def tearDown(self):
+        history.buffer.flush()
+
+    def test_edit_is_buffered_until_flush(self):
+        self.client.force_login(self.test_user)
+        self.client.post(reverse("accounts:edit_profile"), data=self.edit_data)
+        self.assertFalse(ProfileChange.objects.exists())
+        self.assertEqual(history.buffer.flush(), 1)
+
+        change = ProfileChange.objects.get(user=self.test_user)
+        self.assertEqual(json.loads(change.changes), {
+            'bio': ["A little info about me...", "Lorem ipsum dolor sit amet"],
+            'first_name': ['test_fn', 'edited_fn'],
+        })
+
+    def test_failed_flush_keeps_rows(self):
+        self.client.force_login(self.test_user)
+        self.client.post(reverse("accounts:edit_profile"), data=self.edit_data)
+        with mock.patch.object(
+            ProfileChange.objects, 'bulk_create', side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                history.buffer.flush()
+        self.assertEqual(len(history.buffer), 1)
+        self.assertEqual(history.buffer.flush(), 1)
+
+    def test_failed_flush_does_not_fail_the_edit(self):
+        self.client.force_login(self.test_user)
+        with mock.patch.object(history.buffer, 'batch_size', 1), \
+                mock.patch.object(
+                    ProfileChange.objects, 'bulk_create',
+                    side_effect=DatabaseError
+                ), self.assertLogs('accounts.history', 'ERROR'):
+            response = self.client.post(
+                reverse("accounts:edit_profile"), data=self.edit_data
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(history.buffer), 1)
+
+    def test_pending_rows_are_capped(self):
+        buffer = history.ChangeBuffer(
+            batch_size=100, flush_interval=None, max_pending=3
+        )
+        with self.assertLogs('accounts.history', 'ERROR'):
+            for number in range(5):
+                buffer.record(self.test_user, {'bio': ['', str(number)]})
+        self.assertEqual(
+            [json.loads(change.changes)['bio'][1] for change in buffer._pending],
+            ['2', '3', '4']
+        )
+
+    def test_flusher_survives_errors(self):
+        buffer = history.ChangeBuffer(flush_interval=0.01)
+        with mock.patch.object(
+            buffer, 'flush', side_effect=[DatabaseError, DatabaseError, SystemExit]
+        ) as flush, mock.patch.object(history.time, 'sleep'), \
+                self.assertLogs('accounts.history', 'ERROR'):
+            with self.assertRaises(SystemExit):
+                buffer._flush_periodically()
+        self.assertEqual(flush.call_count, 3)
+
+    def test_profile_as_of_before_edit(self):
+        before_edit = timezone.now()
+        self.client.force_login(self.test_user)
+        self.client.post(reverse("accounts:edit_profile"), data=self.edit_data)
+
+        state = history.profile_as_of(self.test_user, before_edit)
+        self.assertEqual(state['bio'], "A little info about me...")
+        self.assertEqual(state['first_name'], 'test_fn')
+        current = history.profile_as_of(self.test_user, timezone.now())
+        self.assertEqual(current['bio'], "Lorem ipsum dolor sit amet")
+
+    def test_compaction_merges_expired_changes(self):
+        long_ago = timezone.now() - timedelta(days=365)
+        for days, (old, new) in enumerate([('a', 'b'), ('b', 'c')]):
+            ProfileChange.objects.create(
+                user=self.test_user,
+                changed_at=long_ago + timedelta(days=days),
+                changes=json.dumps({'bio': [old, new]})
+            )
+        call_command('compact_profile_history', days=90, stdout=StringIO())
+
+        change = ProfileChange.objects.get(user=self.test_user)
+        self.assertEqual(json.loads(change.changes), {'bio': ['a', 'c']})
@@ -0,0 +1,89 @@
+import json
+import os
+from os.path import exists, join
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+
+from . import temporary_directory
+from ..management.commands import collect_orphaned_media
+from ..models import Profile
+
+
+class CollectOrphanedMedia(TestCase):
+    '''Verify that only files no profile references are collected,
+    and that a scan split over several runs covers the whole tree.'''
+
+    multi_db = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = User.objects.create_user('testuser')
+        Profile.objects.create(
+            user=cls.test_user, birth='2019-01-01', bio='Hello World!',
+            avatar='testuser/current.jpg'
+        )
+
+    def setUp(self):
+        self.root = temporary_directory(self)
+        self.checkpoint = join(temporary_directory(self), 'checkpoint.json')
+        self.files = {
+            'testuser/current.jpg': True,
+            'previews/testuser/current.jpg': True,
+            'testuser/old.jpg': False,
+            'zzz/leftover.jpg': False,
+        }
+        for name in self.files:
+            path = join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as media_file:
+                media_file.write(b'12345')
+            os.utime(path, (0, 0))
+
+    def collect(self, **options):
+        output = StringIO()
+        call_command(
+            'collect_orphaned_media', root=self.root,
+            checkpoint=self.checkpoint, stdout=output, **options
+        )
+        return output.getvalue()
+
+    def test_dry_run_deletes_nothing(self):
+        output = self.collect(dry_run=True)
+        self.assertIn("2 orphaned. Would reclaim 10 bytes", output)
+        for name in self.files:
+            self.assertTrue(exists(join(self.root, name)))
+
+    def test_collects_only_orphans(self):
+        output = self.collect()
+        self.assertIn("Reclaimed 10 bytes", output)
+        for name, referenced in self.files.items():
+            self.assertEqual(exists(join(self.root, name)), referenced)
+
+    def test_scan_resumes_from_checkpoint(self):
+        self.collect(max_files=3)
+        self.assertTrue(exists(self.checkpoint))
+        self.assertTrue(exists(join(self.root, 'zzz/leftover.jpg')))
+
+        output = self.collect(max_files=3)
+        self.assertIn("Examined 1 files", output)
+        self.assertFalse(exists(join(self.root, 'zzz/leftover.jpg')))
+        self.assertFalse(exists(self.checkpoint))
+
+    def test_interrupted_scan_keeps_its_place(self):
+        with mock.patch.object(collect_orphaned_media, 'CHECKPOINT_EVERY', 1), \
+                mock.patch.object(os, 'remove', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.collect()
+        with open(self.checkpoint) as checkpoint_file:
+            self.assertEqual(
+                json.load(checkpoint_file)['last_path'], 'testuser/current.jpg'
+            )
+
+    def test_young_files_are_kept(self):
+        os.utime(join(self.root, 'testuser/old.jpg'))
+        self.collect()
+        self.assertTrue(exists(join(self.root, 'testuser/old.jpg')))
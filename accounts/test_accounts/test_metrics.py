@@ -0,0 +1,112 @@
+import json
+import os
+from os.path import join
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+
+from project_7 import metrics, views
+
+from . import temporary_directory
+
+
+class ReadinessView(TestCase):
+    '''Verify that the readiness probe reports database and storage
+    reachability and reuses its result for a short while.'''
+
+    multi_db = True
+
+    def setUp(self):
+        views._readiness.update(checked_at=None, checks=None)
+
+    def test_ready(self):
+        response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['database:default'])
+        self.assertTrue(response.json()['storage'])
+
+    def test_missing_media_root(self):
+        with override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=join(temporary_directory(self), 'missing')
+        ):
+            response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['storage'])
+
+    def test_result_is_cached(self):
+        with mock.patch.object(
+            views, '_run_readiness_checks', return_value={'storage': False}
+        ) as checks:
+            self.assertEqual(self.client.get(reverse('ready')).status_code, 503)
+            self.assertEqual(self.client.get(reverse('ready')).status_code, 503)
+        self.assertEqual(checks.call_count, 1)
+
+
+class MetricsView(TestCase):
+    '''Verify the Prometheus exposition and its aggregation across
+    worker processes.'''
+
+    def sample(self, text, name):
+        for line in text.splitlines():
+            if line.startswith(f"{name} "):
+                return float(line.split()[-1])
+        return 0.0
+
+    def test_failed_login_counted(self):
+        before = self.sample(metrics.render(), 'accounts_failed_logins_total')
+        self.client.post(
+            reverse('accounts:sign_in'),
+            {'username': 'nobody', 'password': 'wrong'}
+        )
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        text = response.content.decode()
+        self.assertEqual(
+            self.sample(text, 'accounts_failed_logins_total'), before + 1
+        )
+        self.assertIn('http_request_duration_seconds_bucket{le="+Inf",'
+                      'view="accounts:sign_in"}', text)
+
+    def test_sign_in_counted(self):
+        User.objects.create_user('testuser', password='*Dh&M3h36v*$J*')
+        before = self.sample(metrics.render(), 'accounts_sign_ins_total')
+        self.client.post(
+            reverse('accounts:sign_in'),
+            {'username': 'testuser', 'password': '*Dh&M3h36v*$J*'}
+        )
+        self.assertEqual(
+            self.sample(metrics.render(), 'accounts_sign_ins_total'), before + 1
+        )
+
+    def test_workers_are_summed(self):
+        directory = temporary_directory(self)
+        with open(os.path.join(directory, '1.json'), 'w') as other_worker:
+            json.dump(
+                [['accounts_sign_ups_total', 'accounts_sign_ups_total', 5]],
+                other_worker
+            )
+        with override_settings(METRICS_DIR=directory):
+            own = self.sample(metrics.render(), 'accounts_sign_ups_total')
+            metrics.SIGN_UPS.inc()
+            total = self.sample(metrics.render(), 'accounts_sign_ups_total')
+        self.assertEqual(total, own + 1)
+        self.assertTrue(
+            os.path.exists(os.path.join(directory, f"{metrics._state['name']}.json"))
+        )
+        self.assertGreaterEqual(own, 5)
+
+    def test_recycled_pid_keeps_earlier_file(self):
+        directory = temporary_directory(self)
+        with override_settings(METRICS_DIR=directory):
+            metrics.SIGN_UPS.inc()
+            metrics.flush()
+            earlier = self.sample(metrics.render(), 'accounts_sign_ups_total')
+            # A new worker that happens to get the same pid.
+            metrics._state['pid'] = None
+            metrics.SIGN_UPS.inc()
+            total = self.sample(metrics.render(), 'accounts_sign_ups_total')
+        self.assertEqual(len(os.listdir(directory)), 2)
+        self.assertEqual(total, earlier + 1)
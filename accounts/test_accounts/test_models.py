@@ -1,12 +1,24 @@
 from os.path import join, dirname
-from django.test import TestCase
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+from ..availability import BloomFilter, email_taken
 from ..models import Profile
+from ..thumbnails import resized_name
 
 
 class ProfileInstanceMethods(TestCase):
 
+    multi_db = True
+
     @classmethod
     def setUpTestData(cls):
         cls.test_user = User.objects.create_user('test_user')
@@ -30,3 +42,90 @@ class ProfileInstanceMethods(TestCase):
     def test_profile_str(self):
         self.assertEqual(str(self.profile), "Profile: test_user")
 
+
+class ProfileAvatarDimensions(TestCase):
+    '''Verify that avatar dimensions are stored on upload and that
+    loading or rendering a profile never opens the image.'''
+
+    multi_db = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = User.objects.create_user('test_user')
+        with open(join(dirname(__file__), 'images/test_image.jpg'), 'rb') as image:
+            cls.profile = Profile.objects.create(
+                user=cls.test_user,
+                birth='2019-01-01',
+                bio='Hello World!',
+                avatar=SimpleUploadedFile(
+                    'test_image.jpg', image.read(), content_type="image/jpeg"
+                )
+            )
+
+    def test_dimensions_stored_on_upload(self):
+        self.assertEqual(
+            (self.profile.avatar_width, self.profile.avatar_height), (640, 359)
+        )
+
+    def test_render_does_not_open_avatar(self):
+        template = Template("{% load avatars %}{% avatar_img profile %}")
+        with mock.patch.object(default_storage, 'open') as storage_open:
+            profile = Profile.objects.for_user(self.test_user)
+            html = template.render(Context({'profile': profile}))
+        storage_open.assert_not_called()
+        self.assertIn('width="640" height="359"', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn(f"{profile.avatar_preview_url} 64w", html)
+        self.assertIn(f"{profile.avatar_resized[0][0]} 320w", html)
+        self.assertIn('sizes="(max-width: 800px) 80vw, 640px"', html)
+
+    def test_resized_copies_built_on_upload(self):
+        profile = Profile.objects.for_user(self.test_user)
+        self.assertEqual([width for _, width in profile.avatar_resized], [320])
+        self.assertTrue(default_storage.exists(
+            resized_name(profile.avatar.name, 320)
+        ))
+        self.assertFalse(default_storage.exists(
+            resized_name(profile.avatar.name, 640)
+        ))
+
+    def test_backfill_command(self):
+        profiles = Profile.objects.using(self.profile._state.db)
+        profiles.update(avatar_width=None, avatar_height=None)
+        call_command('backfill_avatar_dimensions', stdout=StringIO())
+        profile = profiles.get(pk=self.profile.pk)
+        self.assertEqual((profile.avatar_width, profile.avatar_height), (640, 359))
+
+
+class BloomFilterTestCase(SimpleTestCase):
+    '''Verify that the availability filter never misses an added value.'''
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000)
+        values = [f"u:user{number}" for number in range(1000)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(
+            f"u:other{number}" in bloom for number in range(1000)
+        )
+        self.assertLess(false_positives, 50)
+
+
+class EmailTakenTestCase(TestCase):
+    '''Verify that email lookups are case-insensitive and answered from
+    the partial unique index.'''
+
+    def test_case_insensitive(self):
+        user = User.objects.create_user('testuser', 'Test@Email.com')
+        self.assertTrue(email_taken(' test@email.COM '))
+        self.assertFalse(email_taken('test@email.com', exclude_pk=user.pk))
+        self.assertFalse(email_taken('other@email.com'))
+
+    def test_uses_email_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            email_taken('test@email.com')
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {queries[0]['sql']}")
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('accounts_user_email_ci', plan)
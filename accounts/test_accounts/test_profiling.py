@@ -0,0 +1,47 @@
+import os
+
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+from django.utils.six import StringIO
+
+from project_7.profiling import make_profiling_token
+
+from . import temporary_directory
+
+
+class SamplingProfilerMiddlewareTestCase(TestCase):
+    '''Verify that only sampled or flagged requests are profiled and that
+    their profiles are aggregated per URL name.'''
+
+    def setUp(self):
+        self.profiling_dir = temporary_directory(self)
+        self.settings_override = override_settings(
+            PROFILING_DIR=self.profiling_dir, PROFILING_INTERVAL=0.0005
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.sign_up_dir = os.path.join(self.profiling_dir, 'accounts.sign_up')
+
+    def test_unflagged_request_not_profiled(self):
+        self.client.get(reverse("accounts:sign_up"))
+        self.assertFalse(os.path.exists(self.sign_up_dir))
+
+    def test_forged_token_not_profiled(self):
+        self.client.get(
+            reverse("accounts:sign_up"), HTTP_X_PROFILE_REQUEST='profile:forged'
+        )
+        self.assertFalse(os.path.exists(self.sign_up_dir))
+
+    def test_flagged_request_profiled_and_aggregated(self):
+        for _ in range(2):
+            self.client.get(
+                reverse("accounts:sign_up"),
+                HTTP_X_PROFILE_REQUEST=make_profiling_token()
+            )
+        self.assertEqual(len(os.listdir(self.sign_up_dir)), 2)
+
+        output = StringIO()
+        call_command('aggregate_profiles', 'sign_up', stdout=output)
+        self.assertIn("accounts:sign_up: 2 profiles", output.getvalue())
+        self.assertTrue(os.path.exists(f"{self.sign_up_dir}.collapsed"))
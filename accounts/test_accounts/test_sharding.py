@@ -0,0 +1,157 @@
+from unittest import skipIf
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.six import StringIO
+
+from ..models import Profile
+from ..sharding import jump_hash, shard_for, ProfileShardRouter
+
+
+class JumpHashTestCase(SimpleTestCase):
+    '''Verify that adding a shard only moves the keys that land on it.'''
+
+    def test_keys_stay_in_range(self):
+        for key in range(1000):
+            self.assertIn(jump_hash(key, 3), range(3))
+
+    def test_growing_moves_keys_to_new_bucket_only(self):
+        for key in range(1000):
+            before, after = jump_hash(key, 3), jump_hash(key, 4)
+            self.assertIn(after, (before, 3))
+
+    @override_settings(PROFILE_SHARDS=['default', 'profiles_1'])
+    def test_shard_for_uses_alias_names(self):
+        shards = {shard_for(user_id) for user_id in range(1, 100)}
+        self.assertEqual(shards, {'default', 'profiles_1'})
+
+
+class ProfileShardRouterTestCase(SimpleTestCase):
+    '''Verify where the router sends sharded and unsharded models.'''
+
+    router = ProfileShardRouter()
+
+    @override_settings(PROFILE_SHARDS=['default', 'profiles_1'])
+    def test_new_profile_routed_by_user_id(self):
+        profile = Profile(user_id=7)
+        self.assertEqual(
+            self.router.db_for_write(Profile, instance=profile), shard_for(7)
+        )
+
+    def test_existing_profile_stays_put(self):
+        profile = Profile(user_id=7)
+        profile._state.db = 'profiles_1'
+        self.assertEqual(
+            self.router.db_for_read(Profile, instance=profile), 'profiles_1'
+        )
+
+    def test_users_always_on_default(self):
+        profile = Profile(user_id=7)
+        profile._state.db = 'profiles_1'
+        self.assertEqual(
+            self.router.db_for_read(User, instance=profile), 'default'
+        )
+
+
+@skipIf(len(settings.PROFILE_SHARDS) < 2, "needs PROFILE_SHARD_COUNT >= 2")
+class ShardedProfileViews(TestCase):
+    '''Verify that profile views and commands work across shards.'''
+
+    multi_db = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f"testuser{number}", password='*Dh&M3h36v*$J*')
+            for number in range(8)
+        ]
+        for user in cls.users:
+            Profile.objects.create(
+                user=user, birth="2019-01-01", bio=f"About {user.username}"
+            )
+
+    def test_profiles_live_on_their_shard(self):
+        for user in self.users:
+            profile = Profile.objects.using(shard_for(user.pk)).get(user=user)
+            self.assertEqual(profile.user, user)
+
+    def test_profile_view_reads_from_shard(self):
+        for user in self.users:
+            self.client.force_login(user)
+            response = self.client.get(reverse("accounts:profile"))
+            self.assertContains(response, f"About {user.username}")
+
+    def test_export_gathers_all_shards(self):
+        output = StringIO()
+        call_command('export_profiles', stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), 1 + len(self.users))
+
+    def test_rebalance_moves_rows_home(self):
+        user = self.users[0]
+        home = shard_for(user.pk)
+        stray = next(alias for alias in settings.PROFILE_SHARDS if alias != home)
+        profile = Profile.objects.using(home).get(user=user)
+        Profile.objects.using(home).filter(pk=profile.pk).delete()
+        profile.pk = None
+        profile.save(using=stray, force_insert=True)
+
+        self.assertEqual(Profile.objects.for_user(user).bio, profile.bio)
+        call_command('rebalance_profiles', stdout=StringIO())
+        self.assertTrue(Profile.objects.using(home).filter(user=user).exists())
+        self.assertFalse(Profile.objects.using(stray).filter(user=user).exists())
+
+    def test_admin_opens_rows_on_the_selected_shard(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@email.com', '*Dh&M3h36v*$J*'
+        )
+        self.client.force_login(admin)
+        # Each shard numbers its own rows, so pk 1 exists on both.
+        profile = Profile.objects.using('profiles_1').get(pk=1)
+        self.assertTrue(Profile.objects.using('default').filter(pk=1).exists())
+
+        changelist = self.client.get(
+            reverse('admin:accounts_profile_changelist'), {'shard': 'profiles_1'}
+        )
+        change_url = reverse('admin:accounts_profile_change', args=[1])
+        self.assertContains(
+            changelist, f'{change_url}?_changelist_filters=shard%3Dprofiles_1'
+        )
+        filters = {'_changelist_filters': 'shard=profiles_1'}
+        response = self.client.get(change_url, filters)
+        self.assertEqual(response.context['original'], profile)
+        self.assertEqual(response.context['original'].user, profile.user)
+
+        self.client.post(
+            reverse('admin:accounts_profile_delete', args=[1])
+            + '?_changelist_filters=shard%3Dprofiles_1',
+            {'post': 'yes'}
+        )
+        self.assertFalse(Profile.objects.using('profiles_1').filter(pk=1).exists())
+        self.assertTrue(Profile.objects.using('default').filter(pk=1).exists())
+
+    def test_admin_search_finds_profile_on_any_shard(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@email.com', '*Dh&M3h36v*$J*'
+        )
+        self.client.force_login(admin)
+        user = next(user for user in self.users if shard_for(user.pk) != 'default')
+        response = self.client.get(
+            reverse('admin:accounts_profile_changelist'), {'q': user.username}
+        )
+        self.assertEqual(
+            [profile.user for profile in response.context['cl'].result_list],
+            [user]
+        )
+        choices = list(response.context['cl'].filter_specs[0].choices(
+            response.context['cl']
+        ))
+        self.assertEqual(
+            [choice['display'] for choice in choices], settings.PROFILE_SHARDS
+        )
+        self.assertEqual(
+            [choice['display'] for choice in choices if choice['selected']],
+            [shard_for(user.pk)]
+        )
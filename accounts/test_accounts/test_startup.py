@@ -0,0 +1,50 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase
+from django.utils.six import StringIO
+
+
+class WorkerStartup(SimpleTestCase):
+    '''Verify that a cold worker answers its first request without
+    importing the ModelAdmins or Pillow, and that the admin still loads
+    when it is first used.'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        process = subprocess.run(
+            [sys.executable, '-m', 'project_7.startup', '/accounts/sign_in/'],
+            cwd=settings.BASE_DIR, stdout=subprocess.PIPE, check=True
+        )
+        cls.startup = json.loads(process.stdout.decode())
+
+    def test_first_request(self):
+        self.assertEqual(self.startup['status'], '200 OK')
+        self.assertEqual(
+            [name for name, _ in self.startup['phases']],
+            ['import django and settings', 'django.setup()',
+             'project_7.wsgi', 'first request']
+        )
+        self.assertIn('accounts.views', self.startup['imports'])
+
+    def test_heavy_imports_deferred(self):
+        for module in ('accounts.admin', 'django.contrib.auth.admin', 'PIL'):
+            self.assertNotIn(module, self.startup['modules'])
+
+    def test_admin_loads_on_demand(self):
+        self.assertEqual(
+            reverse('admin:accounts_profile_changelist'),
+            '/admin/accounts/profile/'
+        )
+
+    def test_profile_startup_command(self):
+        output = StringIO()
+        call_command('profile_startup', repeat=1, top=3, stdout=output)
+        self.assertIn("/accounts/sign_in/ -> 200 OK", output.getvalue())
+        self.assertIn("django.setup()", output.getvalue())
+        self.assertIn("time to first response", output.getvalue())
@@ -1,7 +1,15 @@
+from datetime import date, datetime
+from unittest import mock
+
+from django.db import connections
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.core.urlresolvers import reverse
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.timezone import utc
 
+from .. import history
 from ..models import Profile
 from ..forms import ProfileForm
 
@@ -38,6 +46,8 @@ class RequestSignInView(TestCase):
     '''Verify that a registered user is redirected
     to their home page after successfully logging in'''
 
+    multi_db = True
+
     @classmethod
     def setUpTestData(cls):
         cls.user_data = {
@@ -94,6 +104,9 @@ class LoginRedirectRequest(TestCase):
 class CreateProfileView(TestCase):
     '''Verify that a profile is created when a user
     is required to provide data in a profile form'''
+
+    multi_db = True
+
     @classmethod
     def setUpTestData(cls):
         cls.test_user = User.objects.create_user(
@@ -121,6 +134,8 @@ class EditedProfileView(TestCase):
     '''Verify that any changes made to user's profile
     are saved when they click "Update Profile".'''
 
+    multi_db = True
+
     @classmethod
     def setUpTestData(cls):
         cls.test_user = User.objects.create_user(
@@ -150,6 +165,9 @@ class EditedProfileView(TestCase):
             **cls.updated_profile_data
         }
 
+    def tearDown(self):
+        history.buffer.flush()
+
     def test_edited_profile_displays_new_profile(self):
         self.client.force_login(self.test_user)
         response = self.client.post(
@@ -161,7 +179,7 @@ class EditedProfileView(TestCase):
         self.assertContains(response, 'Lorem ipsum dolor sit amet')
 
 
-class UpdatePasswordTestCase(TestCase):
+class RejectPasswordTestCase(TestCase):
     '''Verify that a User receives a message telling them
     that a new password cannot contain their username, first name,
     or last name.'''
@@ -221,3 +239,141 @@ class UpdatePasswordTestCase(TestCase):
         )
         self.assertTemplateUsed(response, 'home.html')
         self.assertContains(response, "Your password is updated!")
+
+
+class CheckAvailabilityView(TestCase):
+    '''Verify that the sign up availability check reports taken
+    usernames and emails, ignoring email case.'''
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(
+            username="testuser",
+            email="Test@Email.com",
+            password='*Dh&M3h36v*$J*'
+        )
+
+    def test_taken_username_and_email(self):
+        response = self.client.get(
+            reverse("accounts:check_availability"),
+            {'username': 'testuser', 'email': 'test@email.COM'}
+        )
+        self.assertEqual(
+            response.json(), {'username': False, 'email': False}
+        )
+
+    def test_free_username_and_email(self):
+        response = self.client.get(
+            reverse("accounts:check_availability"),
+            {'username': 'someone_else', 'email': 'someone@email.com'}
+        )
+        self.assertEqual(response.json(), {'username': True, 'email': True})
+
+    def test_sign_up_rejects_taken_email(self):
+        response = self.client.post(reverse("accounts:sign_up"), data={
+            'username': 'newuser',
+            'first_name': 'test_fn',
+            'last_name': 'test_ln',
+            'email': 'TEST@email.com',
+            'verify_email': 'TEST@email.com',
+            'password1': 'efj8eE8*3jaaaaaa#',
+            'password2': 'efj8eE8*3jaaaaaa#'
+        })
+        self.assertFormError(
+            response, 'form', 'email',
+            "An account with that email already exists."
+        )
+
+
+class UpcomingBirthdaysView(TestCase):
+    '''Verify that birthdays are listed soonest first, wrapping over the
+    new year, whichever shard the profile lives on.'''
+
+    multi_db = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = User.objects.create_user(
+            'testuser', password='*Dh&M3h36v*$J*'
+        )
+        for index, birth in enumerate(
+            ['1990-12-30', '1985-01-02', '1992-01-20', '1970-12-01']
+        ):
+            user = User.objects.create_user(f"user{index}")
+            Profile.objects.create(user=user, birth=birth, bio='Hello World!')
+
+    def test_wraps_over_new_year(self):
+        upcoming = Profile.objects.upcoming_birthdays(
+            7, start=date(2019, 12, 28)
+        )
+        self.assertEqual(
+            [str(profile.birth) for profile in upcoming],
+            ['1990-12-30', '1985-01-02']
+        )
+
+    def test_limit_keeps_calendar_order(self):
+        upcoming = Profile.objects.upcoming_birthdays(
+            60, start=date(2019, 12, 1), limit=3
+        )
+        self.assertEqual(
+            [str(profile.birth) for profile in upcoming],
+            ['1970-12-01', '1990-12-30', '1985-01-02']
+        )
+
+    @mock.patch('django.utils.timezone.now')
+    def test_today_in_current_time_zone(self, now):
+        # 23:30 UTC on 29 December is already the 30th at UTC+9.
+        now.return_value = datetime(2019, 12, 29, 23, 30, tzinfo=utc)
+        with timezone.override(timezone.get_fixed_timezone(9 * 60)):
+            upcoming = Profile.objects.upcoming_birthdays(0)
+        self.assertEqual(
+            [str(profile.birth) for profile in upcoming], ['1990-12-30']
+        )
+
+    def test_birthdays_page(self):
+        self.client.login(username='testuser', password='*Dh&M3h36v*$J*')
+        response = self.client.get(
+            reverse("accounts:birthdays"), {'days': 366}
+        )
+        self.assertEqual(response.context['days'], 31)
+        self.assertTemplateUsed(response, 'accounts/birthdays.html')
+
+
+class FlashMessageSessionWrites(TestCase):
+    '''Verify that flash messages travel in a cookie, so redirecting
+    with one never writes the session.'''
+
+    multi_db = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_user = User.objects.create_user(
+            'testuser', password='*Dh&M3h36v*$J*'
+        )
+
+    def session_writes(self, queries):
+        return [
+            query['sql'] for query in queries
+            if 'django_session' in query['sql'] and
+            not query['sql'].startswith('SELECT')
+        ]
+
+    def test_sign_out_to_home(self):
+        self.client.login(username='testuser', password='*Dh&M3h36v*$J*')
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.client.get(
+                reverse("accounts:sign_out"), follow=True
+            )
+        self.assertContains(response, "signed out. Come back soon!")
+        writes = self.session_writes(queries.captured_queries)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('DELETE'))
+
+    def test_profile_redirect_message(self):
+        self.client.login(username='testuser', password='*Dh&M3h36v*$J*')
+        with CaptureQueriesContext(connections['default']) as queries:
+            response = self.client.get(
+                reverse("accounts:profile"), follow=True
+            )
+        self.assertContains(response, "Provide more detail about yourself")
+        self.assertEqual(self.session_writes(queries.captured_queries), [])
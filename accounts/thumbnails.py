@@ -0,0 +1,84 @@
+from io import BytesIO
+from posixpath import join
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+
+PREVIEW_DIR = 'previews'
+PREVIEW_SIZE = (64, 64)
+RESIZED_DIR = 'resized'
+RESPONSIVE_WIDTHS = (320, 640, 1280)
+
+
+def preview_name(avatar_name):
+    return join(PREVIEW_DIR, avatar_name)
+
+
+def resized_name(avatar_name, width):
+    return join(RESIZED_DIR, str(width), avatar_name)
+
+
+def responsive_widths(width):
+    '''The RESPONSIVE_WIDTHS an avatar `width` pixels wide is resized to.'''
+    return [candidate for candidate in RESPONSIVE_WIDTHS if candidate < width]
+
+
+def derived_names(avatar_name, width=None):
+    '''Storage names of every file built from an avatar: its preview and
+    its resized copies, at every width when `width` is not known.'''
+    widths = responsive_widths(width) if width else RESPONSIVE_WIDTHS
+    return [preview_name(avatar_name)] + [
+        resized_name(avatar_name, candidate) for candidate in widths
+    ]
+
+
+def _save_jpeg(image, name, storage):
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=80)
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def make_preview(avatar, size=PREVIEW_SIZE, storage=default_storage):
+    '''Write a small JPEG preview of `avatar` next to the other
+    previews and return its storage name.'''
+
+    # Pillow is only needed when an avatar is actually processed.
+    from PIL import Image
+
+    name = preview_name(avatar.name)
+    with avatar.storage.open(avatar.name, 'rb') as source:
+        image = Image.open(source)
+        image.thumbnail(size)
+        return _save_jpeg(image, name, storage)
+
+
+def make_resized(avatar, storage=default_storage):
+    '''Write a JPEG of `avatar` at each of its responsive widths, so a
+    srcset can offer the browser something close to the displayed size,
+    and return their storage names.'''
+    from PIL import Image
+
+    names = []
+    with avatar.storage.open(avatar.name, 'rb') as source:
+        image = Image.open(source)
+        width, height = image.size
+        for target in responsive_widths(width):
+            resized = image.resize(
+                (target, max(round(height * target / width), 1)), Image.LANCZOS
+            )
+            names.append(
+                _save_jpeg(resized, resized_name(avatar.name, target), storage)
+            )
+    return names
+
+
+def preview_dimensions(width, height, size=PREVIEW_SIZE):
+    '''Dimensions make_preview produces for a `width` x `height` image,
+    worked out without opening it.'''
+    scale = min(size[0] / width, size[1] / height, 1)
+    return max(int(width * scale), 1), max(int(height * scale), 1)
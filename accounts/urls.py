@@ -4,9 +4,12 @@ from . import views
 urlpatterns = [
     url(r'sign_in/$', views.sign_in, name='sign_in'),
     url(r'sign_up/$', views.sign_up, name='sign_up'),
+    url(r'sign_up/availability/$',
+        views.check_availability, name='check_availability'),
     url(r'sign_out/$', views.sign_out, name='sign_out'),
     url(r'profile/$', views.profile, name='profile'),
     url(r'profile_create/$',views.new_profile, name="new_profile"),
+    url(r'birthdays/$', views.birthdays, name="birthdays"),
     url(r'profile_edit/$', views.edit_profile, name="edit_profile"),
     url( r'profile/change_password/$',
         views.change_password, name="change_password"
@@ -1,8 +1,13 @@
 import re
+from collections import Counter
+from functools import lru_cache
 from string import punctuation
 from django.core.exceptions import ValidationError
 
 
+PERSONAL_INFO_MSG = "Password cannot contain: Username; First Name; Last Name"
+
+
 def validate_bio(value):
     if len(value) < 10:
         raise ValidationError("Add more detail to your bio.")
@@ -37,3 +42,75 @@ class ValidatePasswordCharacters:
     def get_help_text(self):
         return """A password must at least one digit, one uppercase letter,
         one lowercase letter, and one special character"""
+
+
+@lru_cache(maxsize=1024)
+def identity_patterns(values, min_token_length):
+    '''Prepare the checks for one user's (username, first_name,
+    last_name, email) once, casefolded: a single alternation matching any
+    of the names, and the character counts of every value and its parts
+    for the similarity check.'''
+    names = {
+        value.casefold() for value in values[:3]
+        if len(value) >= min_token_length
+    }
+    pattern = None
+    if names:
+        pattern = re.compile('|'.join(
+            re.escape(name) for name in sorted(names, key=len, reverse=True)
+        ))
+    parts = []
+    for index, value in enumerate(values):
+        for part in set(re.split(r'\W+', value) + [value]):
+            if part:
+                part = part.casefold()
+                parts.append((index, len(part), Counter(part)))
+    return pattern, parts
+
+
+class PersonalInfoValidator:
+    '''Rejects passwords containing the username, first name or last name
+    in any case, or too similar to any of them or the email address.
+
+    Stands in for UserAttributeSimilarityValidator with the same
+    similarity measure (SequenceMatcher.quick_ratio), skipping values
+    whose length alone rules a match out.'''
+
+    USER_ATTRIBUTES = ('username', 'first_name', 'last_name', 'email')
+
+    def __init__(self, max_similarity=0.7, min_token_length=3):
+        self.max_similarity = max_similarity
+        self.min_token_length = min_token_length
+
+    def validate(self, password, user=None):
+        if not user or not password:
+            return
+        values = tuple(
+            getattr(user, name, None) or '' for name in self.USER_ATTRIBUTES
+        )
+        pattern, parts = identity_patterns(values, self.min_token_length)
+        password = password.casefold()
+        if pattern is not None and pattern.search(password):
+            raise ValidationError(
+                PERSONAL_INFO_MSG, code='password_contains_personal_info'
+            )
+
+        length, counts = len(password), None
+        for index, part_length, part_counts in parts:
+            bound = self.max_similarity * (length + part_length)
+            if 2 * min(length, part_length) <= bound:
+                continue
+            counts = counts or Counter(password)
+            if 2 * sum((counts & part_counts).values()) > bound:
+                attribute = self.USER_ATTRIBUTES[index]
+                raise ValidationError(
+                    "The password is too similar to the %(verbose_name)s.",
+                    code='password_too_similar',
+                    params={'verbose_name': user._meta.get_field(
+                        attribute
+                    ).verbose_name},
+                )
+
+    def get_help_text(self):
+        return ("Your password can't contain your username or name, or be "
+                "too similar to your other personal information.")
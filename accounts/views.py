@@ -1,19 +1,28 @@
 from django.contrib import messages
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import authenticate, get_user_model, login, logout
 from django.contrib.auth.forms import (
     AuthenticationForm, UserCreationForm, PasswordChangeForm
 )
 from django.core.urlresolvers import reverse
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import render
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_GET
 from django.forms.models import model_to_dict
 
+from project_7 import metrics
+
+from .availability import index
+from .cards import load_card, rebuild_card
 from .forms import UserAccountCreationForm, ProfileForm, EditUserForm
+from .history import record_profile_edit
 from .models import Profile
 
 
+BIRTHDAYS_LIMIT = 100
+
+
 def sign_in(request):
     form = AuthenticationForm()
     if request.method == 'POST':
@@ -45,6 +54,7 @@ def sign_up(request):
         form = UserAccountCreationForm(data=request.POST)
         if form.is_valid():
             form.save()
+            metrics.SIGN_UPS.inc()
             user = authenticate(
                 username=form.cleaned_data['username'],
                 password=form.cleaned_data['password1']
@@ -58,23 +68,64 @@ def sign_up(request):
     return render(request, 'accounts/sign_up.html', {'form': form})
 
 
+@require_GET
+def check_availability(request):
+    '''Tell the sign up form whether a username and/or email is free
+    before the form is posted.'''
+    availability = {}
+    username = request.GET.get('username', '').strip()
+    email = request.GET.get('email', '').strip()
+    if username:
+        availability['username'] = index.username_available(username)
+    if email:
+        availability['email'] = index.email_available(email)
+    return JsonResponse(availability)
+
+
 def sign_out(request):
     logout(request)
     messages.success(request, "You've been signed out. Come back soon!")
     return HttpResponseRedirect(reverse("home"))
 
 
+def _count_avatar_upload(request):
+    avatar = request.FILES.get('avatar')
+    if avatar is not None:
+        metrics.AVATAR_UPLOAD_BYTES.observe(avatar.size)
+
+
 @login_required(login_url="/accounts/sign_in/")
 def profile(request):
     user = request.user
+    card = load_card(user)
+    if card is None:
+        try:
+            profile = Profile.objects.for_user(user)
+        except Profile.DoesNotExist:
+            messages.info(request, "Provide more detail about yourself...")
+            return HttpResponseRedirect(
+                reverse("accounts:new_profile")
+            )
+        card = rebuild_card(profile, user)
+    return render(request, 'accounts/profile.html', {'card': card})
+
+
+@login_required(login_url="/accounts/sign_in/")
+def birthdays(request):
     try:
-        profile = Profile.objects.get(id=user.id)
-    except Profile.DoesNotExist:
-        messages.info(request, "Provide more detail about yourself...")
-        return HttpResponseRedirect(
-            reverse("accounts:new_profile")
-        )
-    return render(request, 'accounts/profile.html', {'profile': profile})
+        days = min(max(int(request.GET.get('days', 7)), 0), 31)
+    except ValueError:
+        days = 7
+    profiles = Profile.objects.upcoming_birthdays(days, limit=BIRTHDAYS_LIMIT)
+    users = get_user_model()._default_manager.in_bulk(
+        [profile.user_id for profile in profiles]
+    )
+    upcoming = [(users[profile.user_id], profile) for profile in profiles]
+    return render(
+        request, 'accounts/birthdays.html',
+        {'upcoming': upcoming, 'days': days,
+         'truncated': len(upcoming) == BIRTHDAYS_LIMIT}
+    )
 
 
 @login_required(login_url="/accounts/sign_in/")
@@ -85,6 +136,7 @@ def new_profile(request):
         if form.is_valid():
             form.cleaned_data.update(user=user)
             Profile.objects.create(**form.cleaned_data)
+            _count_avatar_upload(request)
             return HttpResponseRedirect(
                 reverse("accounts:profile")
             )
@@ -103,7 +155,7 @@ def edit_profile(request):
         user,
         fields=['username', 'first_name', 'last_name', 'email', 'verify_email']
     )
-    current_profile = Profile.objects.get(user=user)
+    current_profile = Profile.objects.for_user(user)
     profile_data = model_to_dict(
         current_profile, fields=['birth', 'bio', 'avatar']
     )
@@ -118,6 +170,9 @@ def edit_profile(request):
         if profile_form.is_valid() and user_form.is_valid():
             profile_form.save()
             user_form.save()
+            record_profile_edit(user, profile_form, user_form)
+            metrics.PROFILE_EDITS.inc()
+            _count_avatar_upload(request)
             if any(data.has_changed() for data in [profile_form, user_form]):
                 messages.success(request, "Your profile is updated!")
             else:
@@ -143,27 +198,10 @@ def change_password(request):
     if request.method == 'POST':
         form = PasswordChangeForm(user, request.POST)
         if form.is_valid():
-            updated_password = form.cleaned_data['new_password2']
-            user_identity = [user.first_name, user.last_name, user.username]
-            alternative_identities = [name.title() if name.islower() else name.lower() for name in user_identity]
-            user_identity.extend(list(alternative_identities))
-
-            if (any(name in updated_password
-                    for name in user_identity)):
-                messages.info(
-                    request,
-                    "Password cannot contain: Username; First Name; Last Name"
-                )
-                return HttpResponseRedirect(
-                    reverse(
-                        "accounts:change_password"
-                    )
-                )
-            else:
-                form.save()
-                update_session_auth_hash(request, form.user)
-                messages.success(request, "Your password is updated!")
-                return HttpResponseRedirect(reverse("home"))
+            form.save()
+            update_session_auth_hash(request, form.user)
+            messages.success(request, "Your password is updated!")
+            return HttpResponseRedirect(reverse("home"))
     else:
         form = PasswordChangeForm(user)
     return render(request, 'accounts/change_password.html', {'form': form})
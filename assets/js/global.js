@@ -51,7 +51,16 @@ $( document ).ready(function() {
     return "<a class='button " + state + "'>" + text + "</div>";
   });
 
+  // Flags a taken username or email on the sign up form before posting
+  $("form[data-availability-url]").on("change", "#id_username, #id_email", function(){
+    var field = $(this);
+    var name = field.attr("name");
+    var url = field.closest("form").data("availability-url");
+    var query = {};
+    query[name] = field.val();
+    $.getJSON(url, query, function(availability) {
+      field.toggleClass("error", availability[name] === false);
+    });
+  });
 
-
-
-});
\ No newline at end of file
+});
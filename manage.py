@@ -3,7 +3,10 @@ import os
 import sys
 
 if __name__ == "__main__":
-    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project_7.settings")
+    settings_module = "project_7.settings"
+    if sys.argv[1:2] == ["test"]:
+        settings_module = "project_7.test_settings"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
 
     from django.core.management import execute_from_command_line
 
@@ -0,0 +1,12 @@
+"""
+Admin URLs, imported the first time an admin URL is resolved or
+reversed. Importing the ModelAdmins (and everything they import) is left
+until then rather than done by every worker at start-up.
+"""
+
+from django.contrib import admin
+
+
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
@@ -0,0 +1,251 @@
+"""
+Online snapshots of the SQLite databases and MEDIA_ROOT.
+
+Databases are copied with SQLite's online backup API, a few pages per
+step with a pause between steps, so writers are only ever held up for one
+step. SQLite restarts the copy if the source changes in the middle, so
+the result is always a consistent snapshot. Each copy is checked with
+PRAGMA integrity_check, then gzipped.
+
+Media is incremental. Every snapshot's manifest lists the whole tree as
+{path: [size, mtime_ns]}, but the snapshot only holds the files that
+changed since the previous one. A restore takes each file from the
+newest snapshot that holds it.
+"""
+
+import ctypes
+import ctypes.util
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+
+
+MANIFEST = 'manifest.json'
+CHUNK_SIZE = 1 << 20
+
+_SQLITE_OK, _SQLITE_BUSY, _SQLITE_LOCKED, _SQLITE_DONE = 0, 5, 6, 101
+
+
+def _ctypes_backup(source, target, pages, sleep):
+    # sqlite3.Connection.backup() only exists from Python 3.7 on; drive
+    # the same C API directly before that.
+    library = ctypes.CDLL(ctypes.util.find_library('sqlite3'))
+    library.sqlite3_open_v2.argtypes = [
+        ctypes.c_char_p, ctypes.POINTER(ctypes.c_void_p), ctypes.c_int,
+        ctypes.c_char_p,
+    ]
+    library.sqlite3_close.argtypes = [ctypes.c_void_p]
+    library.sqlite3_backup_init.restype = ctypes.c_void_p
+    library.sqlite3_backup_init.argtypes = [
+        ctypes.c_void_p, ctypes.c_char_p, ctypes.c_void_p, ctypes.c_char_p,
+    ]
+    library.sqlite3_backup_step.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    library.sqlite3_backup_finish.argtypes = [ctypes.c_void_p]
+    library.sqlite3_errstr.restype = ctypes.c_char_p
+
+    source_db, target_db = ctypes.c_void_p(), ctypes.c_void_p()
+    try:
+        for path, handle, flags in ((source, source_db, 0x01),    # READONLY
+                                    (target, target_db, 0x06)):   # READWRITE|CREATE
+            code = library.sqlite3_open_v2(
+                os.fsencode(path), ctypes.byref(handle), flags, None
+            )
+            if code != _SQLITE_OK:
+                raise sqlite3.OperationalError(
+                    f"{path}: {library.sqlite3_errstr(code).decode()}"
+                )
+        backup = library.sqlite3_backup_init(target_db, b'main', source_db, b'main')
+        if not backup:
+            raise sqlite3.OperationalError(f"Cannot back up {source}.")
+        while True:
+            code = library.sqlite3_backup_step(backup, pages)
+            if code == _SQLITE_DONE:
+                break
+            if code not in (_SQLITE_OK, _SQLITE_BUSY, _SQLITE_LOCKED):
+                library.sqlite3_backup_finish(backup)
+                raise sqlite3.OperationalError(
+                    f"{source}: {library.sqlite3_errstr(code).decode()}"
+                )
+            time.sleep(sleep)
+        code = library.sqlite3_backup_finish(backup)
+        if code != _SQLITE_OK:
+            raise sqlite3.OperationalError(
+                f"{source}: {library.sqlite3_errstr(code).decode()}"
+            )
+    finally:
+        library.sqlite3_close(target_db)
+        library.sqlite3_close(source_db)
+
+
+def copy_database(source, target, pages=64, sleep=0.005):
+    '''Copy the SQLite file `source` to `target` `pages` pages at a time,
+    sleeping `sleep` seconds between steps.'''
+    if not hasattr(sqlite3.Connection, 'backup'):
+        _ctypes_backup(source, target, pages, sleep)
+    else:
+        source_connection = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+        target_connection = sqlite3.connect(target)
+        try:
+            source_connection.backup(target_connection, pages=pages, sleep=sleep)
+        finally:
+            target_connection.close()
+            source_connection.close()
+    check_database(target)
+
+
+def check_database(path):
+    connection = sqlite3.connect(path)
+    try:
+        result = connection.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        connection.close()
+    if result != 'ok':
+        raise sqlite3.DatabaseError(f"{path} failed integrity_check: {result}")
+
+
+def _compress(source, target):
+    digest = hashlib.sha256()
+    with open(source, 'rb') as raw, gzip.open(target, 'wb') as compressed:
+        for chunk in iter(lambda: raw.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+            compressed.write(chunk)
+    return digest.hexdigest()
+
+
+def _decompress(source, target):
+    digest = hashlib.sha256()
+    with gzip.open(source, 'rb') as compressed, open(target, 'wb') as raw:
+        for chunk in iter(lambda: compressed.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+            raw.write(chunk)
+    return digest.hexdigest()
+
+
+def media_state(root):
+    '''{relative path: [size, mtime_ns]} for every file under `root`.'''
+    state = {}
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            state[os.path.relpath(path, root)] = [stat.st_size, stat.st_mtime_ns]
+    return state
+
+
+def snapshots(backup_dir):
+    '''Names of the finished snapshots in `backup_dir`, oldest first.'''
+    if not os.path.isdir(backup_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(backup_dir)
+        if os.path.isfile(os.path.join(backup_dir, name, MANIFEST))
+    )
+
+
+def read_manifest(backup_dir, name):
+    with open(os.path.join(backup_dir, name, MANIFEST)) as manifest:
+        return json.load(manifest)
+
+
+def create_snapshot(backup_dir, databases, media_root, pages=64, sleep=0.005):
+    '''Snapshot `databases` ({alias: path}) and whatever changed under
+    `media_root` since the last snapshot. Returns the snapshot's manifest.'''
+    previous = (snapshots(backup_dir) or [None])[-1]
+    known = read_manifest(backup_dir, previous)['media'] if previous else {}
+
+    name = datetime.utcnow().strftime('%Y%m%dT%H%M%S%fZ')
+    partial = os.path.join(backup_dir, f"{name}.partial")
+    os.makedirs(partial)
+    manifest = {
+        'previous': previous, 'databases': {}, 'media': {},
+        'changed': [], 'removed': [],
+    }
+    try:
+        for alias, path in databases.items():
+            copy = os.path.join(partial, f"{alias}.sqlite3")
+            copy_database(path, copy, pages, sleep)
+            manifest['databases'][alias] = {
+                'file': f"{alias}.sqlite3.gz",
+                'sha256': _compress(copy, f"{copy}.gz"),
+            }
+            os.remove(copy)
+
+        manifest['media'] = media_state(media_root)
+        for path, entry in sorted(manifest['media'].items()):
+            if known.get(path) == entry:
+                continue
+            target = os.path.join(partial, 'media', path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(os.path.join(media_root, path), target)
+            manifest['changed'].append(path)
+        manifest['removed'] = sorted(set(known) - set(manifest['media']))
+
+        with open(os.path.join(partial, MANIFEST), 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+        # Only a complete snapshot gets its final name, so an interrupted
+        # run is never mistaken for the last one.
+        os.rename(partial, os.path.join(backup_dir, name))
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+    manifest['name'] = name
+    return manifest
+
+
+def restore_snapshot(backup_dir, name, databases, media_root):
+    '''Put `databases` ({alias: path}) and `media_root` back to snapshot
+    `name`. The site must be stopped.'''
+    manifest = read_manifest(backup_dir, name)
+
+    # Walk back through the chain to find the newest copy of every file.
+    sources, pending, current = {}, set(manifest['media']), name
+    while pending and current:
+        step = read_manifest(backup_dir, current)
+        for path in pending.intersection(step['changed']):
+            sources[path] = os.path.join(backup_dir, current, 'media', path)
+        pending.difference_update(sources)
+        current = step['previous']
+    if pending:
+        raise FileNotFoundError(
+            f"No snapshot holds {len(pending)} media files, e.g. {min(pending)}."
+        )
+
+    # Every database is unpacked and checked before any is swapped in, so
+    # a bad copy leaves the site as it was rather than half restored.
+    restored = {path: f"{path}.restoring" for path in databases.values()}
+    try:
+        for alias, path in databases.items():
+            entry = manifest['databases'][alias]
+            digest = _decompress(
+                os.path.join(backup_dir, name, entry['file']), restored[path]
+            )
+            if digest != entry['sha256']:
+                raise sqlite3.DatabaseError(
+                    f"{entry['file']} does not match its checksum."
+                )
+            check_database(restored[path])
+    except BaseException:
+        for copy in restored.values():
+            if os.path.exists(copy):
+                os.remove(copy)
+        raise
+    for path, copy in restored.items():
+        for suffix in ('-wal', '-shm', '-journal'):
+            if os.path.exists(f"{path}{suffix}"):
+                os.remove(f"{path}{suffix}")
+        os.replace(copy, path)
+
+    live = media_state(media_root)
+    for path, entry in manifest['media'].items():
+        if live.get(path) != entry:
+            target = os.path.join(media_root, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(sources[path], target)
+    for path in set(live) - set(manifest['media']):
+        os.remove(os.path.join(media_root, path))
+    return manifest
@@ -0,0 +1,145 @@
+"""
+Brotli or gzip compression for responses, including streamed ones.
+
+The encoding is negotiated from Accept-Encoding, preferring brotli when the
+optional `brotli` package is installed. Responses smaller than
+COMPRESSION_MIN_SIZE bytes are left alone, and streamed responses are
+compressed chunk by chunk and sync-flushed so each chunk still goes out as
+soon as the view yields it.
+
+Pages that carry a CSRF token are exposed to BREACH, which recovers the
+token by watching the compressed length change while an attacker's page
+sends requests. Those pages are therefore never compressed for cross-site
+requests (Sec-Fetch-Site, or Referer when the browser does not send it).
+When they are compressed, up to COMPRESSION_BREACH_PADDING bytes of random
+padding are added to muddy the measurement.
+"""
+
+import random
+import zlib
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import get_random_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript',
+    'application/xml', 'image/svg+xml',
+)
+
+_random = random.SystemRandom()
+
+
+def accepted_encoding(accept_encoding):
+    '''The best encoding we can produce for an Accept-Encoding header,
+    or None. Brotli wins ties with gzip.'''
+    available = ['br', 'gzip'] if brotli is not None else ['gzip']
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        weight = 1.0
+        if params.strip().startswith('q='):
+            try:
+                weight = float(params.strip()[2:])
+            except ValueError:
+                continue
+        weights[coding.strip().lower()] = weight
+    best = None
+    for coding in available:
+        weight = weights.get(coding, weights.get('*', 0))
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (coding, weight)
+    return best[0] if best else None
+
+
+def compressor(encoding, level=None):
+    '''A (compress, flush, finish) triple for one response body.'''
+    if encoding == 'br':
+        stream = brotli.Compressor(quality=level if level is not None else 4)
+        return stream.process, stream.flush, stream.finish
+    stream = zlib.compressobj(level if level is not None else 6, zlib.DEFLATED, 31)
+    return (
+        stream.compress,
+        lambda: stream.flush(zlib.Z_SYNC_FLUSH),
+        stream.flush,
+    )
+
+
+def _is_cross_site(request):
+    fetch_site = request.META.get('HTTP_SEC_FETCH_SITE')
+    if fetch_site:
+        return fetch_site not in ('same-origin', 'none')
+    referer = request.META.get('HTTP_REFERER')
+    return bool(referer) and urlparse(referer).netloc != request.get_host()
+
+
+class CompressionMiddleware:
+    '''Keep this right after RequestLatencyMiddleware, ahead of anything
+    that reads or rewrites the response body.'''
+
+    def __init__(self):
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 512)
+        self.levels = {
+            'br': getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4),
+            'gzip': getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6),
+        }
+        self.padding = getattr(settings, 'COMPRESSION_BREACH_PADDING', 32)
+
+    def _should_compress(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code == 206:
+            return False
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return False
+        if not response.streaming and len(response.content) < self.min_size:
+            return False
+        return not (
+            request.META.get('CSRF_COOKIE_USED') and _is_cross_site(request)
+        )
+
+    def _padding(self, request, response):
+        if not (request.META.get('CSRF_COOKIE_USED') and self.padding and
+                response.get('Content-Type', '').startswith('text/html')):
+            return b''
+        length = _random.randint(0, self.padding)
+        return f"<!-- {get_random_string(length)} -->".encode()
+
+    def process_response(self, request, response):
+        # Whether or not this response is compressed, another client may
+        # get a compressed one, so shared caches must key on the header.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not self._should_compress(request, response):
+            return response
+        encoding = accepted_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compress, flush, finish = compressor(encoding, self.levels[encoding])
+        padding = self._padding(request, response)
+        if response.streaming:
+            def compressed(chunks):
+                for chunk in chunks:
+                    data = compress(chunk)
+                    yield data + flush() if chunk else data
+                yield compress(padding) + finish()
+
+            response.streaming_content = compressed(response.streaming_content)
+            del response['Content-Length']
+        else:
+            body = compress(response.content + padding) + finish()
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+
+        etag = response.get('ETag', '')
+        if etag.startswith('"'):
+            response['ETag'] = f"W/{etag}"
+        response['Content-Encoding'] = encoding
+        return response
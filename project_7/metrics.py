@@ -0,0 +1,184 @@
+"""
+Prometheus text-format metrics that add up across pre-forked workers.
+
+Every sample is an additive total, histograms included (cumulative bucket
+counts, _sum and _count), so each worker keeps its own totals, writes them
+to METRICS_DIR/<pid>-<start time>.json at most once every
+METRICS_FLUSH_INTERVAL seconds and at exit, and a scrape simply sums all
+the files. Files of workers that have exited are kept so counters never
+go backwards; the start time keeps a worker that is handed a recycled
+pid from overwriting the file of the one that had it before.
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_families = {}
+_lock = threading.Lock()
+_state = {'pid': None, 'name': None, 'values': None, 'flushed_at': 0}
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _sample(name, labels):
+    if not labels:
+        return name
+    pairs = ','.join(
+        f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())
+    )
+    return f'{name}{{{pairs}}}'
+
+
+def _values():
+    if _state['pid'] != os.getpid():
+        # A forked worker starts from zero; its parent keeps its own file.
+        _state.update(
+            pid=os.getpid(), name=f"{os.getpid()}-{int(time.time() * 1e6)}",
+            values=defaultdict(float), flushed_at=0
+        )
+    return _state['values']
+
+
+def _add(family, samples):
+    with _lock:
+        values = _values()
+        for sample, amount in samples:
+            values[(family, sample)] += amount
+        due = time.monotonic() - _state['flushed_at'] >= getattr(
+            settings, 'METRICS_FLUSH_INTERVAL', 1.0
+        )
+    if due:
+        flush()
+
+
+def flush():
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        return
+    with _lock:
+        values = dict(_values())
+        name = _state['name']
+        _state['flushed_at'] = time.monotonic()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.json")
+    with open(f"{path}.tmp", 'w') as metrics_file:
+        json.dump(
+            [[family, sample, value] for (family, sample), value in values.items()],
+            metrics_file
+        )
+    os.replace(f"{path}.tmp", path)
+
+
+atexit.register(flush)
+
+
+class Counter:
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        _families[name] = self
+
+    def inc(self, amount=1, **labels):
+        _add(self.name, [(_sample(self.name, labels), amount)])
+
+
+class Histogram:
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = sorted(buckets)
+        _families[name] = self
+
+    def observe(self, value, **labels):
+        samples = [
+            (_sample(f"{self.name}_bucket", {**labels, 'le': bound}),
+             1 if value <= bound else 0)
+            for bound in self.buckets
+        ]
+        samples.append((_sample(f"{self.name}_bucket", {**labels, 'le': '+Inf'}), 1))
+        samples.append((_sample(f"{self.name}_sum", labels), value))
+        samples.append((_sample(f"{self.name}_count", labels), 1))
+        _add(self.name, samples)
+
+
+def collect():
+    '''Totals across every worker that has written a metrics file, or
+    just this process when METRICS_DIR is not set.'''
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        with _lock:
+            return dict(_values())
+    flush()
+    totals = defaultdict(float)
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        try:
+            with open(path) as metrics_file:
+                rows = json.load(metrics_file)
+        except (OSError, ValueError):
+            continue
+        for family, sample, value in rows:
+            totals[(family, sample)] += value
+    return totals
+
+
+def render():
+    by_family = defaultdict(list)
+    for (family, sample), value in collect().items():
+        by_family[family].append((sample, value))
+    lines = []
+    for name, family in sorted(_families.items()):
+        lines.append(f"# HELP {name} {family.documentation}")
+        lines.append(f"# TYPE {name} {family.kind}")
+        for sample, value in sorted(by_family.get(name, [])):
+            lines.append(f"{sample} {value!r}")
+    return '\n'.join(lines) + '\n'
+
+
+SIGN_INS = Counter('accounts_sign_ins_total', "Successful sign ins.")
+FAILED_LOGINS = Counter('accounts_failed_logins_total', "Failed sign in attempts.")
+SIGN_UPS = Counter('accounts_sign_ups_total', "Accounts created through sign up.")
+PROFILE_EDITS = Counter('accounts_profile_edits_total', "Saved profile edits.")
+AVATAR_UPLOAD_BYTES = Histogram(
+    'accounts_avatar_upload_bytes', "Size of uploaded avatars in bytes.",
+    buckets=[16e3, 64e3, 256e3, 1e6, 4e6, 16e6]
+)
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', "Request latency by view.",
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+)
+
+
+class RequestLatencyMiddleware:
+    '''Keep this first in MIDDLEWARE_CLASSES so the timing covers the
+    rest of the stack.'''
+
+    def process_request(self, request):
+        request._metrics_started = time.monotonic()
+
+    def process_response(self, request, response):
+        started = getattr(request, '_metrics_started', None)
+        if started is not None:
+            match = getattr(request, 'resolver_match', None)
+            REQUEST_LATENCY.observe(
+                time.monotonic() - started,
+                view=match.view_name if match else 'unresolved'
+            )
+        return response
@@ -0,0 +1,118 @@
+"""
+Opt-in sampling profiler for individual requests.
+
+A request is profiled when it wins the PROFILING_SAMPLE_RATE lottery or
+carries an `X-Profile-Request` header holding a token from
+`make_profiling_token()`. While its view runs, a background thread records
+the request thread's stack every PROFILING_INTERVAL seconds; the samples
+are written in collapsed-stack format (flamegraph.pl, speedscope) to
+PROFILING_DIR/<url name>/. Unsampled requests cost one random() call.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+
+
+HEADER = 'HTTP_X_PROFILE_REQUEST'
+SALT = 'project_7.profiling'
+
+
+def make_profiling_token():
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def _token_is_valid(token, max_age):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def profile_dir(view_name):
+    return os.path.join(settings.PROFILING_DIR, view_name.replace(':', '.'))
+
+
+class StackSampler:
+    '''Counts the stacks seen on one thread at a fixed interval.'''
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(
+                f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+            )
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as collapsed:
+            for stack, count in self.samples.most_common():
+                collapsed.write(f"{stack} {count}\n")
+
+
+class SamplingProfilerMiddleware:
+    '''Keep this last in MIDDLEWARE_CLASSES so the samples cover the view
+    and its template rendering rather than the other middleware.'''
+
+    def __init__(self):
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        self.interval = getattr(settings, 'PROFILING_INTERVAL', 0.005)
+        self.token_max_age = getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600)
+
+    def _wants_profile(self, request):
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        token = request.META.get(HEADER)
+        return bool(token) and _token_is_valid(token, self.token_max_age)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self._wants_profile(request):
+            return None
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        request._profiling_sampler = sampler
+        sampler.start()
+        return None
+
+    def process_response(self, request, response):
+        sampler = getattr(request, '_profiling_sampler', None)
+        if sampler is not None:
+            del request._profiling_sampler
+            sampler.stop()
+            match = request.resolver_match
+            view_name = match.view_name if match else 'unresolved'
+            sampler.write(os.path.join(
+                profile_dir(view_name),
+                f"{int(time.time() * 1000000)}-{os.getpid()}.collapsed"
+            ))
+        return response
@@ -31,7 +31,9 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # No autodiscovery at start-up; project_7.admin_urls runs it the
+    # first time an admin URL is resolved.
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -41,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE_CLASSES = [
+    'project_7.metrics.RequestLatencyMiddleware',
+    'project_7.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,6 +53,7 @@ MIDDLEWARE_CLASSES = [
     'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'project_7.profiling.SamplingProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'project_7.urls'
@@ -83,13 +88,26 @@ DATABASES = {
     }
 }
 
+# Profile rows are spread over these aliases by user id; see
+# accounts.sharding. Set PROFILE_SHARD_COUNT to add local SQLite shards.
+PROFILE_SHARDS = ['default']
+for shard in range(1, int(os.environ.get('PROFILE_SHARD_COUNT', 1))):
+    alias = f'profiles_{shard}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.{alias}.sqlite3'),
+    }
+    PROFILE_SHARDS.append(alias)
+
+DATABASE_ROUTERS = ['accounts.sharding.ProfileShardRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.9/ref/settings/#auth-password-validators
 
 AUTH_PASSWORD_VALIDATORS = [
     {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+        'NAME': 'accounts.validate.PersonalInfoValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
@@ -109,6 +127,15 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Flash messages
+# Nearly every accounts view redirects with a message. Keeping messages in
+# a signed cookie means carrying one never saves the session, and the
+# session is only written when it actually changes.
+
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+SESSION_SAVE_EVERY_REQUEST = False
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.9/topics/i18n/
 
@@ -133,4 +160,33 @@ STATICFILES_DIRS = [
 
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-MEDIA_URL = '/media/'
\ No newline at end of file
+MEDIA_URL = '/media/'
+
+# Where backup_site writes snapshots and restore_site reads them.
+BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
+
+
+# Request profiling (project_7.profiling)
+# Fraction of requests to sample; flagged requests are always sampled.
+
+PROFILING_SAMPLE_RATE = 0
+PROFILING_INTERVAL = 0.005
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+
+
+# Metrics (project_7.metrics)
+# With pre-forked workers, point METRICS_DIR at a directory shared by all
+# of them and empty it before the workers start.
+
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 1.0
+READINESS_CACHE_SECONDS = 5
+
+
+# Response compression (project_7.compression)
+# Brotli is used when the optional `brotli` package is installed.
+
+COMPRESSION_MIN_SIZE = 512
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 4
+COMPRESSION_BREACH_PADDING = 32
@@ -0,0 +1,128 @@
+"""
+Worker start-up: preloading before fork, and measuring cold starts.
+
+`preload(application)` does the work a worker would otherwise do on its
+first request: load the middleware, import the URLconf and views, and
+build the template engines. A server that imports the app once and then
+forks (gunicorn --preload, uWSGI without lazy-apps) then hands every
+worker a warm copy. It opens no database connection, because that must
+not be shared across a fork.
+
+`python -m project_7.startup [path]` measures a cold start in the
+current interpreter: the import time of each module, django.setup(),
+building the WSGI application, and a first GET of `path`. The result is
+printed as JSON. The profile_startup command runs it in a fresh process
+and reports on it.
+"""
+
+import io
+import json
+import os
+import sys
+import time
+
+
+def preload(application):
+    from django.core.urlresolvers import get_resolver
+    from django.template import engines
+
+    application.load_middleware()
+    get_resolver(None).reverse_dict
+    engines.all()
+
+
+class _TimedLoader:
+
+    def __init__(self, loader, timer):
+        self._loader = loader
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._timer.run(module.__name__, self._loader.exec_module, module)
+
+
+class ImportTimer:
+    '''Meta path hook recording (cumulative, self) seconds for every
+    module executed while it is installed.'''
+
+    def __init__(self):
+        self.timings = {}
+        self._children = []
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, 'find_spec', None)
+            if finder is self or find_spec is None:
+                continue
+            spec = find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def run(self, name, exec_module, module):
+        started = time.perf_counter()
+        self._children.append(0.0)
+        try:
+            exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            self.timings[name] = (elapsed, elapsed - children)
+
+
+def measure(path='/accounts/sign_in/'):
+    timer = ImportTimer()
+    sys.meta_path.insert(0, timer)
+    phases = []
+
+    def phase(name, started):
+        phases.append((name, time.perf_counter() - started))
+        return time.perf_counter()
+
+    started = time.perf_counter()
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project_7.settings")
+    import django
+    from django.conf import settings
+    settings.INSTALLED_APPS
+    started = phase('import django and settings', started)
+    django.setup()
+    started = phase('django.setup()', started)
+    from project_7.wsgi import application
+    started = phase('project_7.wsgi', started)
+
+    statuses = []
+    response = application({
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'SCRIPT_NAME': '',
+        'QUERY_STRING': '', 'SERVER_NAME': 'localhost', 'SERVER_PORT': '80',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False, 'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }, lambda status, headers, exc_info=None: statuses.append(status))
+    b''.join(response)
+    response.close()
+    phase('first request', started)
+
+    sys.meta_path.remove(timer)
+    return {
+        'status': statuses[0] if statuses else None,
+        'phases': phases,
+        'imports': timer.timings,
+        'modules': sorted(sys.modules),
+    }
+
+
+if __name__ == '__main__':
+    json.dump(measure(*sys.argv[1:]), sys.stdout)
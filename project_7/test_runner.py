@@ -0,0 +1,10 @@
+from django.test.runner import DiscoverRunner, default_test_processes
+
+
+class ParallelDiscoverRunner(DiscoverRunner):
+    '''Run tests on every core unless `--parallel` says otherwise.'''
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(parallel=default_test_processes())
@@ -0,0 +1,29 @@
+"""
+Settings for running the test suite: `python manage.py test` picks them up
+automatically.
+
+Users are hashed with MD5 instead of PBKDF2, every database lives in memory
+and uploaded avatars never touch MEDIA_ROOT.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+# Two in-memory profile shards keep the sharded code paths under test.
+PROFILE_SHARDS = ['default', 'profiles_1']
+DATABASES = {
+    alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+    for alias in PROFILE_SHARDS
+}
+
+DEFAULT_FILE_STORAGE = 'project_7.test_storage.InMemoryStorage'
+
+# Tests flush the history buffer themselves; no background thread.
+PROFILE_HISTORY_FLUSH_INTERVAL = None
+
+METRICS_DIR = None
+
+TEST_RUNNER = 'project_7.test_runner.ParallelDiscoverRunner'
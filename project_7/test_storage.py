@@ -0,0 +1,56 @@
+from posixpath import dirname, basename
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from django.utils.encoding import filepath_to_uri
+
+
+@deconstructible
+class InMemoryStorage(Storage):
+    '''Keeps uploaded files in a dict for the life of the process,
+    so tests never write into MEDIA_ROOT.'''
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url or settings.MEDIA_URL
+        self._files = {}
+
+    def _open(self, name, mode='rb'):
+        content, _ = self._files[name]
+        return ContentFile(content, name=name)
+
+    def _save(self, name, content):
+        content.seek(0)
+        data = content.read()
+        if isinstance(data, str):
+            data = data.encode()
+        self._files[name] = (data, timezone.now())
+        return name
+
+    def delete(self, name):
+        self._files.pop(name, None)
+
+    def exists(self, name):
+        return not name or name in self._files
+
+    def listdir(self, path):
+        path = path.rstrip('/')
+        directories, files = set(), []
+        for name in self._files:
+            if dirname(name) == path:
+                files.append(basename(name))
+            elif name.startswith(f"{path}/" if path else ''):
+                directories.add(name[len(path):].lstrip('/').split('/')[0])
+        return sorted(directories), sorted(files)
+
+    def size(self, name):
+        return len(self._files[name][0])
+
+    def url(self, name):
+        return urljoin(self.base_url, filepath_to_uri(name))
+
+    def modified_time(self, name):
+        return self._files[name][1]
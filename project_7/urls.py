@@ -13,18 +13,24 @@ Including another URLconf
     1. Import the include() function: from django.conf.urls import url, include
     2. Add a URL to urlpatterns:  url(r'^blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.conf import settings
 from django.conf.urls import url, include
 from django.conf.urls.static import static
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
+from django.core.urlresolvers import RegexURLResolver
 
 from . import views
 
 urlpatterns = [
-    url(r'^admin/', admin.site.urls),
+    # A resolver given the module path imports it only when an admin URL
+    # is first resolved or reversed, unlike include().
+    RegexURLResolver(
+        r'^admin/', 'project_7.admin_urls', app_name='admin', namespace='admin'
+    ),
     url(r'^accounts/', include('accounts.urls', namespace='accounts')),
     url(r'^$', views.home, name='home'),
+    url(r'^health/ready/$', views.ready, name='ready'),
+    url(r'^metrics/$', views.metrics_view, name='metrics'),
 ]
 urlpatterns += staticfiles_urlpatterns()
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
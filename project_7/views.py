@@ -1,5 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 
+from . import metrics
+
+
+_readiness = {'checked_at': None, 'checks': None}
+
 
 def home(request):
-    return render(request, 'home.html')
\ No newline at end of file
+    return render(request, 'home.html')
+
+
+def _run_readiness_checks():
+    checks = {}
+    for alias in settings.DATABASES:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            checks[f"database:{alias}"] = True
+        except Exception:
+            checks[f"database:{alias}"] = False
+    try:
+        # One stat of the storage root; listing it would grow with MEDIA_ROOT.
+        checks['storage'] = default_storage.exists('')
+    except Exception:
+        checks['storage'] = False
+    return checks
+
+
+def ready(request):
+    '''Load balancer readiness probe. The checks run at most once every
+    READINESS_CACHE_SECONDS per worker; other probes get the cached answer.'''
+    checked_at = _readiness['checked_at']
+    max_age = getattr(settings, 'READINESS_CACHE_SECONDS', 5)
+    if checked_at is None or time.monotonic() - checked_at > max_age:
+        _readiness.update(
+            checks=_run_readiness_checks(), checked_at=time.monotonic()
+        )
+    checks = _readiness['checks']
+    return JsonResponse(checks, status=200 if all(checks.values()) else 503)
+
+
+def metrics_view(request):
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
@@ -11,6 +11,9 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from .startup import preload
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project_7.settings")
 
 application = get_wsgi_application()
+preload(application)